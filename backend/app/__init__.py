@@ -1,15 +1,38 @@
 from flask import Flask
-from .extensions import mongo, jwt
+from .extensions import mongo, jwt, mongo_client_options, READ_PREFERENCES
+from .json_provider import BSONJSONProvider
+from .monitoring import pool_metrics, command_metrics
 from flask_cors import CORS
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object("app.config.Config")
+    app.json = BSONJSONProvider(app)
+
+    if app.config['MONGO_READONLY_READ_PREFERENCE'] not in READ_PREFERENCES:
+        raise ValueError(f"Unknown MONGO_READONLY_READ_PREFERENCE, expected one of {list(READ_PREFERENCES)}")
 
     CORS(app)
-    mongo.init_app(app)
+    mongo.init_app(
+        app,
+        event_listeners=[pool_metrics, command_metrics],
+        **mongo_client_options(app.config)
+    )
     jwt.init_app(app)
 
+    from .services import meal_generation_service
+    from .jobs import job_runner
+    from .repositories import preferences_repository, user_repository
+    from .auth.hashing import password_hasher
+    meal_generation_service.init_app(app)
+    job_runner.init_app(app)
+    preferences_repository.init_app(app)
+    user_repository.init_app(app)
+    password_hasher.init_app(app)
+
+    from .bootstrap import database_bootstrap
+    database_bootstrap.init_app(app)
+
     from .auth.routes import auth_bp
     from .routes import meal_plans_bp, badges_bp, challenges_bp, preferences_bp
     
@@ -19,4 +42,13 @@ def create_app():
     app.register_blueprint(challenges_bp, url_prefix='/api')
     app.register_blueprint(preferences_bp, url_prefix='/api')
 
+    from .precompute import precompute_meal_plans_command
+    from .indexes import audit_indexes_command
+    from .imports import import_preferences_command
+    from .challenge_progress import migrate_challenge_progress_command
+    app.cli.add_command(precompute_meal_plans_command)
+    app.cli.add_command(audit_indexes_command)
+    app.cli.add_command(import_preferences_command)
+    app.cli.add_command(migrate_challenge_progress_command)
+
     return app
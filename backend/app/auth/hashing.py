@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+class HashingQueueFull(Exception):
+    """Raised when every hashing worker is busy and the hashing queue is at capacity"""
+
+def _parse_method(method: str) -> Tuple[str, int]:
+    """Split a werkzeug method string into its algorithm and a comparable cost.
+
+    'scrypt:32768:8:1' costs n * r * p and 'pbkdf2:sha256:600000' its iteration count.
+    """
+    name, *params = method.split(':')
+    if name == 'scrypt':
+        n, r, p = (int(value) for value in params) if params else (2 ** 15, 8, 1)
+        return 'scrypt', n * r * p
+    if name == 'pbkdf2':
+        digest = params[0] if params else 'sha256'
+        iterations = int(params[1]) if len(params) > 1 else 600000
+        return f'pbkdf2:{digest}', iterations
+    raise ValueError(f"Unsupported password hash method '{method}'")
+
+class PasswordHasher:
+    """Runs password KDFs on a small dedicated pool so a login storm cannot starve other requests.
+
+    hashlib's scrypt and pbkdf2 release the GIL, so worker threads hash in
+    parallel with request handling. A slot is held from submission until the hash
+    is done, and a caller that finds no free slot gets HashingQueueFull at once
+    instead of queueing behind the storm.
+    """
+
+    def __init__(self):
+        self.method = 'scrypt:32768:8:1'
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[threading.BoundedSemaphore] = None
+
+    def init_app(self, app) -> None:
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        _parse_method(self.method)
+        workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        queue_depth = app.config.get('PASSWORD_HASH_QUEUE_DEPTH', 16)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hasher')
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, method=self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """Whether a stored hash uses another algorithm or a lower cost than the configured method"""
+        try:
+            algorithm, cost = _parse_method(pwhash.split('$', 1)[0])
+        except ValueError:
+            return True
+        configured_algorithm, configured_cost = _parse_method(self.method)
+        return algorithm != configured_algorithm or cost < configured_cost
+
+    def _run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise HashingQueueFull()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+password_hasher = PasswordHasher()
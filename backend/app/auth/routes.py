@@ -1,13 +1,17 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
-from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 import re
 from datetime import timedelta
-from ..extensions import mongo
+from ..extensions import mongo, readonly_collection
+from ..health_metrics import user_health_metrics, cohort_health_metrics, HEALTH_FIELDS
+from .hashing import password_hasher, HashingQueueFull
+from ..repositories import user_repository
 
 auth_bp = Blueprint('auth', __name__)
 
+COHORT_BATCH_SIZE = 10000
+
 def validate_email(email):
     """Validate email format"""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -25,6 +29,25 @@ def validate_password(password):
         return False, "Password must contain at least one number"
     return True, "Password is valid"
 
+def _auth_busy_response():
+    """Fast 503 while the password hashing queue is full"""
+    return jsonify({
+        'success': False,
+        'message': 'Server is busy, please try again shortly'
+    }), 503, {'Retry-After': '1'}
+
+def _upgrade_password_hash(user, password):
+    """Re-hash a verified password with the configured method; best effort"""
+    try:
+        upgraded_hash = password_hasher.hash(password)
+    except HashingQueueFull:
+        return
+    # Only replace the hash that was verified, never a password changed in the meantime
+    mongo.db.users.update_one(
+        {'_id': user['_id'], 'password': user['password']},
+        {'$set': {'password': upgraded_hash}}
+    )
+
 @auth_bp.route('/api/auth/register', methods=['POST'])
 def register():
     try:
@@ -52,11 +75,6 @@ def register():
             errors['email'] = 'Email is required'
         elif not validate_email(email):
             errors['email'] = 'Please enter a valid email address'
-        else:
-            # Check if email already exists
-            existing_user = mongo.db.users.find_one({'email': email})
-            if existing_user:
-                errors['email'] = 'Email already registered'
         
         # Password validation
         if not password:
@@ -93,7 +111,7 @@ def register():
             return jsonify({'success': False, 'errors': errors}), 400
         
         # Hash password
-        hashed_password = generate_password_hash(password)
+        hashed_password = password_hasher.hash(password)
         
         # Create user document
         user_data = {
@@ -109,13 +127,19 @@ def register():
             'medical_conditions': medical_conditions,
             'preferred_units': preferred_units,
             'target_weight': float(target_weight) if target_weight else None,
-            'created_at': mongo.db.users.find_one({}, {'_id': 1}) is None,  # First user is admin
+            'created_at': False,  # First user is admin, claimed once the insert succeeds
             'is_active': True,
             'profile_complete': True
         }
         
-        # Insert user into database
-        result = mongo.db.users.insert_one(user_data)
+        # Insert user into database; the unique email index rejects duplicates atomically
+        try:
+            result = mongo.db.users.insert_one(user_data)
+        except DuplicateKeyError:
+            return jsonify({'success': False, 'errors': {'email': 'Email already registered'}}), 400
+        
+        if user_repository.claim_first_user(result.inserted_id):
+            mongo.db.users.update_one({'_id': result.inserted_id}, {'$set': {'created_at': True}})
         
         # Create JWT token
         access_token = create_access_token(
@@ -136,6 +160,8 @@ def register():
             }
         }), 201
         
+    except HashingQueueFull:
+        return _auth_busy_response()
     except Exception as e:
         print(f"Registration error: {str(e)}")
         return jsonify({
@@ -181,12 +207,15 @@ def login():
             }), 401
         
         # Verify password
-        if not check_password_hash(user['password'], password):
+        if not password_hasher.verify(user['password'], password):
             return jsonify({
                 'success': False,
                 'message': 'Invalid email or password'
             }), 401
         
+        if password_hasher.needs_rehash(user['password']):
+            _upgrade_password_hash(user, password)
+        
         # Create JWT token
         access_token = create_access_token(
             identity=str(user['_id']),
@@ -208,6 +237,8 @@ def login():
             }
         }), 200
         
+    except HashingQueueFull:
+        return _auth_busy_response()
     except Exception as e:
         print(f"Login error: {str(e)}")
         return jsonify({
@@ -220,7 +251,7 @@ def login():
 def get_profile():
     try:
         user_id = get_jwt_identity()
-        user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
+        user = user_repository.get_user(user_id)
         
         if not user:
             return jsonify({
@@ -228,10 +259,6 @@ def get_profile():
                 'message': 'User not found'
             }), 404
         
-        # Remove sensitive data
-        user.pop('password', None)
-        user['_id'] = str(user['_id'])
-        
         return jsonify({
             'success': True,
             'user': user
@@ -258,7 +285,7 @@ def logout():
 def calculate_health_metrics():
     try:
         user_id = get_jwt_identity()
-        user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
+        user = user_repository.get_health_profile(user_id)
         
         if not user:
             return jsonify({
@@ -278,57 +305,15 @@ def calculate_health_metrics():
                 'message': 'Incomplete user data for calculations'
             }), 400
         
-        # Convert height from cm to meters
-        height_in_meters = height / 100
-        
-        # Calculate BMI: BMI = weight(kg) / height(m)^2
-        bmi = weight / (height_in_meters * height_in_meters)
-        
-
-        gender_value = 1 if gender.lower() == 'male' else 0
-        bfp = 1.20 * bmi + 0.23 * age - 10.8 * gender_value - 5.4
-        
-        # Determine BMI category
-        if bmi < 18.5:
-            bmi_category = 'Underweight'
-        elif bmi < 25:
-            bmi_category = 'Normal weight'
-        elif bmi < 30:
-            bmi_category = 'Overweight'
-        else:
-            bmi_category = 'Obese'
-        
-        # Determine BFP category
-        if gender_value == 1:  # Male
-            if bfp < 6:
-                bfp_category = 'Essential fat'
-            elif bfp < 14:
-                bfp_category = 'Athletes'
-            elif bfp < 18:
-                bfp_category = 'Fitness'
-            elif bfp < 25:
-                bfp_category = 'Average'
-            else:
-                bfp_category = 'Obese'
-        else:  # Female
-            if bfp < 14:
-                bfp_category = 'Essential fat'
-            elif bfp < 21:
-                bfp_category = 'Athletes'
-            elif bfp < 25:
-                bfp_category = 'Fitness'
-            elif bfp < 32:
-                bfp_category = 'Average'
-            else:
-                bfp_category = 'Obese'
+        metrics = user_health_metrics(weight, height, age, gender)
         
         return jsonify({
             'success': True,
             'metrics': {
-                'bmi': round(bmi, 2),
-                'bfp': round(bfp, 2),
-                'bmi_category': bmi_category,
-                'bfp_category': bfp_category,
+                'bmi': round(metrics['bmi'], 2),
+                'bfp': round(metrics['bfp'], 2),
+                'bmi_category': metrics['bmi_category'],
+                'bfp_category': metrics['bfp_category'],
                 'user_data': {
                     'weight': weight,
                     'height': height,
@@ -345,6 +330,51 @@ def calculate_health_metrics():
             'message': 'An error occurred while calculating health metrics'
         }), 500
 
+@auth_bp.route('/api/auth/calculate-health-metrics/cohort', methods=['GET'])
+@jwt_required()
+def calculate_cohort_health_metrics():
+    try:
+        if not user_repository.is_admin(get_jwt_identity()):
+            return jsonify({
+                'success': False,
+                'message': 'Admin access required'
+            }), 403
+        
+        cohort = {}
+        if request.args.get('fitness_level'):
+            cohort['fitness_level'] = request.args['fitness_level']
+        if request.args.get('gender'):
+            cohort['gender'] = re.compile(f"^{re.escape(request.args['gender'])}$", re.IGNORECASE)
+        age_range = {}
+        for key, operator in (('min_age', '$gte'), ('max_age', '$lte')):
+            if key not in request.args:
+                continue
+            try:
+                age_range[operator] = int(request.args[key])
+            except ValueError:
+                # Dropping an unparseable bound would silently widen the cohort
+                return jsonify({
+                    'success': False,
+                    'message': f'{key} must be a whole number'
+                }), 400
+        if age_range:
+            cohort['age'] = age_range
+        
+        users = readonly_collection('users').find(cohort, HEALTH_FIELDS).batch_size(COHORT_BATCH_SIZE)
+        
+        return jsonify({
+            'success': True,
+            'cohort': {key: request.args[key] for key in ('fitness_level', 'gender', 'min_age', 'max_age') if key in request.args},
+            'metrics': cohort_health_metrics(users)
+        }), 200
+        
+    except Exception as e:
+        print(f"Cohort health metrics error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'An error occurred while calculating cohort health metrics'
+        }), 500
+
 @auth_bp.route('/api/auth/test')
 def test_auth():
     return jsonify({'message': 'Auth blueprint working'}) 
\ No newline at end of file
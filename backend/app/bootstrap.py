@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pymongo
+from flask import jsonify
+from pymongo.errors import PyMongoError
+from .extensions import mongo
+from .indexes import ensure_indexes
+from .repositories import user_repository
+
+class DatabaseBootstrap:
+    """One-time database setup, run before the first request rather than inside create_app.
+
+    `flask` CLI commands and worker boots therefore never wait on an unreachable
+    server. Each attempt is bounded by MONGO_BOOTSTRAP_TIMEOUT_MS, and a failed
+    attempt is retried by a request arriving RETRY_INTERVAL seconds later or more.
+
+    Requests get a 503 until setup succeeds: registration relies on the unique
+    email index to reject duplicates and on the first-user marker being seeded.
+    """
+
+    RETRY_INTERVAL = 5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._done = False
+        self._retry_at = 0.0
+        self.auto_index = True
+        self.timeout = 5.0
+
+    def init_app(self, app) -> None:
+        self.auto_index = app.config.get('MONGO_AUTO_INDEX', self.auto_index)
+        self.timeout = app.config.get('MONGO_BOOTSTRAP_TIMEOUT_MS', 5000) / 1000
+        self._done = False
+        self._retry_at = 0.0
+        app.before_request(self._before_request)
+
+    def _before_request(self):
+        if self._done:
+            return None
+        with self._lock:
+            if not self._done and time.monotonic() >= self._retry_at:
+                self._done = self.run(mongo.db)
+                self._retry_at = time.monotonic() + self.RETRY_INTERVAL
+        if not self._done:
+            return jsonify({
+                'success': False,
+                'error': 'Database is not ready, please retry shortly'
+            }), 503, {'Retry-After': str(self.RETRY_INTERVAL)}
+        return None
+
+    def run(self, db) -> bool:
+        """Set the database up; False when it is unreachable or not usable yet"""
+        try:
+            with pymongo.timeout(self.timeout):
+                if self.auto_index and not ensure_indexes(db):
+                    return False
+                if 'email_unique' not in db.users.index_information():
+                    print("Database not ready: the users.email_unique index is missing; "
+                          "create it with `flask audit-indexes`")
+                    return False
+                user_repository.seed_first_user_marker(db)
+        except PyMongoError as e:
+            print(f"Database bootstrap error: {str(e)}")
+            return False
+        return True
+
+database_bootstrap = DatabaseBootstrap()
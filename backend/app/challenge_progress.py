@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+import click
+from bson import ObjectId
+from flask.cli import with_appcontext
+from pymongo import UpdateOne
+from .extensions import mongo
+
+# A challenge's days are stored as bits of an integer counted from `start_day`:
+# `completed_mask` has a bit for every day of the challenge and `progress_bits`
+# the subset that is done, so the challenge is complete when the two are equal.
+DAY_FORMAT = '%Y-%m-%d'
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+def new_progress(start_date: datetime, duration: int) -> Dict[str, Any]:
+    """Encoded progress of a freshly joined challenge"""
+    return {
+        'start_day': datetime.combine(start_date.date(), datetime.min.time()),
+        'progress_bits': 0,
+        'completed_mask': (1 << duration) - 1
+    }
+
+def encode_progress(progress: Dict[str, bool]) -> Dict[str, Any]:
+    """Encode a legacy {'YYYY-MM-DD': bool} progress dict"""
+    days = {datetime.strptime(day, DAY_FORMAT): done for day, done in progress.items()}
+    start_day = min(days) if days else datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    encoded = {'start_day': start_day, 'progress_bits': 0, 'completed_mask': 0}
+    for day, done in days.items():
+        bit = 1 << (day - start_day).days
+        encoded['completed_mask'] |= bit
+        if done:
+            encoded['progress_bits'] |= bit
+    return encoded
+
+def decode_progress(user_challenge: Dict[str, Any]) -> Dict[str, bool]:
+    """The {'YYYY-MM-DD': bool} progress the API returns, from either representation"""
+    if 'progress_bits' not in user_challenge:
+        return user_challenge.get('progress', {})
+    start_day = user_challenge['start_day']
+    mask = user_challenge['completed_mask']
+    bits = user_challenge['progress_bits']
+    return {
+        (start_day + timedelta(days=offset)).strftime(DAY_FORMAT): bool(bits >> offset & 1)
+        for offset in range(mask.bit_length())
+        if mask >> offset & 1
+    }
+
+def day_bit(user_challenge: Dict[str, Any], day: datetime) -> int:
+    """The bit of `day` in an encoded challenge, or 0 when the day is not part of it"""
+    offset = (day - user_challenge['start_day']).days
+    if offset < 0:
+        return 0
+    return (1 << offset) & user_challenge['completed_mask']
+
+def _has_bit(value: Any, bit: Any) -> Dict[str, Any]:
+    """Aggregation expression testing one bit of an integer; `bit` must be a positive power of two"""
+    return {'$eq': [{'$mod': [{'$floor': {'$divide': [value, bit]}}, 2]}, 1]}
+
+def complete_day_pipeline(day: datetime):
+    """Update pipeline setting `day`'s bit and settling completion in the same write.
+
+    The bit is computed on the server from `start_day`, so the client does not need
+    to read the document first. Bits are tested with integer arithmetic because the
+    `$bitOr`/`$bitAnd` aggregation operators require MongoDB 6.3.
+    """
+    offset = {'$toLong': {'$divide': [{'$subtract': [day, '$start_day']}, MS_PER_DAY]}}
+    is_complete = {'$eq': ['$progress_bits', '$completed_mask']}
+    return [
+        {'$set': {'_day_bit': {'$cond': [
+            {'$and': [{'$gte': [offset, 0]}, {'$lt': [offset, 62]}]},
+            {'$toLong': {'$pow': [2, offset]}},
+            0
+        ]}}},
+        {'$set': {'progress_bits': {'$cond': [
+            {'$and': [
+                {'$gt': ['$_day_bit', 0]},
+                _has_bit('$completed_mask', {'$max': ['$_day_bit', 1]}),
+                {'$not': [_has_bit('$progress_bits', {'$max': ['$_day_bit', 1]})]}
+            ]},
+            {'$add': ['$progress_bits', '$_day_bit']},
+            '$progress_bits'
+        ]}}},
+        {'$set': {
+            'completed': {'$or': [{'$eq': ['$completed', True]}, is_complete]},
+            'completed_at': {'$cond': [
+                {'$and': [{'$ne': ['$completed', True]}, is_complete]},
+                '$$NOW',
+                '$completed_at'
+            ]}
+        }},
+        {'$unset': '_day_bit'}
+    ]
+
+def award_completion_pipeline(awarded_xp: int, now: datetime):
+    """User update pipeline adding a challenge's XP and badge, then levelling up once if XP reaches level * 100"""
+    badge = {
+        'name': 'Challenge Master',
+        'details': 'Completed a fitness challenge',
+        'icon': '🏆',
+        'category': 'challenge',
+        'awarded_at': now
+    }
+    next_level = {'$add': ['$level', 1]}
+    levels_up = {'$gte': ['$experience', {'$multiply': ['$level', 100]}]}
+    milestone = {
+        'name': {'$concat': ['Level ', {'$toString': next_level}]},
+        'details': {'$concat': ['Reached level ', {'$toString': next_level}]},
+        'icon': '⭐',
+        'category': 'level',
+        'awarded_at': {'$literal': now}
+    }
+    return [
+        {'$set': {
+            'experience': {'$add': [{'$ifNull': ['$experience', 0]}, awarded_xp]},
+            'level': {'$ifNull': ['$level', 1]},
+            'badges': {'$concatArrays': [{'$ifNull': ['$badges', []]}, [{'$literal': badge}]]},
+            'milestones': {'$ifNull': ['$milestones', []]}
+        }},
+        # Both fields are computed from the same input document, so they agree
+        {'$set': {
+            'milestones': {'$cond': [levels_up, {'$concatArrays': ['$milestones', [milestone]]}, '$milestones']},
+            'level': {'$cond': [levels_up, next_level, '$level']}
+        }}
+    ]
+
+def migrate_legacy_challenge(user_challenge_id: ObjectId) -> bool:
+    """Encode one legacy document in place; False when it is missing or already encoded"""
+    legacy = mongo.db.user_challenges.find_one(
+        {'_id': user_challenge_id, 'progress_bits': {'$exists': False}},
+        {'progress': 1}
+    )
+    if not legacy:
+        return False
+    mongo.db.user_challenges.update_one(
+        {'_id': user_challenge_id, 'progress_bits': {'$exists': False}},
+        {'$set': encode_progress(legacy.get('progress') or {}), '$unset': {'progress': ''}}
+    )
+    return True
+
+def migrate_challenge_progress(chunk_size: int = 1000, progress=None) -> int:
+    """Encode every legacy challenge document; safe to re-run or to run alongside traffic"""
+    legacy = {'progress_bits': {'$exists': False}}
+    migrated = 0
+    chunk = []
+    for user_challenge in mongo.db.user_challenges.find(legacy, {'progress': 1}).batch_size(chunk_size):
+        chunk.append(UpdateOne(
+            # Re-checking the filter skips documents encoded meanwhile by a lazy migration
+            {'_id': user_challenge['_id'], **legacy},
+            {'$set': encode_progress(user_challenge.get('progress') or {}), '$unset': {'progress': ''}}
+        ))
+        if len(chunk) >= chunk_size:
+            migrated += mongo.db.user_challenges.bulk_write(chunk, ordered=False).modified_count
+            chunk = []
+            if progress:
+                progress(migrated)
+    if chunk:
+        migrated += mongo.db.user_challenges.bulk_write(chunk, ordered=False).modified_count
+    return migrated
+
+@click.command('migrate-challenge-progress')
+@click.option('--chunk-size', default=1000, show_default=True, help='Documents rewritten per bulk write.')
+@with_appcontext
+def migrate_challenge_progress_command(chunk_size):
+    """Convert challenge progress from per-day keys to the bitset encoding."""
+    migrated = migrate_challenge_progress(chunk_size, progress=lambda count: click.echo(f'{count} challenges migrated'))
+    click.echo(f'Migrated {migrated} challenges.')
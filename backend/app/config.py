@@ -3,4 +3,39 @@ import os
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret")
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "dev-jwt-secret")
-    MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/fitness_companion")
\ No newline at end of file
+    MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/fitness_companion")
+    MONGO_AUTO_INDEX = os.environ.get("MONGO_AUTO_INDEX", "1") == "1"
+    # Upper bound on the one-time database setup run before the first request
+    MONGO_BOOTSTRAP_TIMEOUT_MS = int(os.environ.get("MONGO_BOOTSTRAP_TIMEOUT_MS", 5000))
+    MEAL_GA_ENGINE = os.environ.get("MEAL_GA_ENGINE", "python")
+    MEAL_GA_PATIENCE = int(os.environ.get("MEAL_GA_PATIENCE", 10))
+    MEAL_GA_TIME_BUDGET_MS = float(os.environ.get("MEAL_GA_TIME_BUDGET_MS", 0)) or None
+    MEAL_EXHAUSTIVE_POOL_LIMIT = int(os.environ.get("MEAL_EXHAUSTIVE_POOL_LIMIT", 20))
+    MEAL_PLAN_CACHE_SIZE = int(os.environ.get("MEAL_PLAN_CACHE_SIZE", 1024))
+    MEAL_PLAN_CACHE_TTL = int(os.environ.get("MEAL_PLAN_CACHE_TTL", 24 * 60 * 60))
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+    JOB_QUEUE_DEPTH = int(os.environ.get("JOB_QUEUE_DEPTH", 100))
+    MEAL_BATCH_WORKERS = int(os.environ.get("MEAL_BATCH_WORKERS", 0)) or None
+    # Batches with fewer genetic-algorithm plans than this run in the web process
+    MEAL_BATCH_PARALLEL_MIN = int(os.environ.get("MEAL_BATCH_PARALLEL_MIN", 16))
+    MEAL_BATCH_MAX_ITEMS = int(os.environ.get("MEAL_BATCH_MAX_ITEMS", 500))
+    MEAL_WEEK_REPEAT_WINDOW = int(os.environ.get("MEAL_WEEK_REPEAT_WINDOW", 2))
+    PREFERENCES_CACHE_SIZE = int(os.environ.get("PREFERENCES_CACHE_SIZE", 4096))
+    PREFERENCES_CACHE_TTL = int(os.environ.get("PREFERENCES_CACHE_TTL", 300))
+    PREFERENCES_CACHE_VERSIONED = os.environ.get("PREFERENCES_CACHE_VERSIONED", "0") == "1"
+    STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", 100))
+    MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 100))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", 0)) or None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 30000))
+    # Comma-separated, in order of preference, e.g. "zstd,snappy,zlib"
+    MONGO_COMPRESSORS = os.environ.get("MONGO_COMPRESSORS", "")
+    # Read preference of read-only endpoints; secondary reads may lag the user's own writes
+    MONGO_READONLY_READ_PREFERENCE = os.environ.get("MONGO_READONLY_READ_PREFERENCE", "primary")
+    # Any werkzeug method string, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000"
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_QUEUE_DEPTH = int(os.environ.get("PASSWORD_HASH_QUEUE_DEPTH", 16))
+    # Set the size to 0 to disable the cache of level/experience/award counts
+    USER_SUMMARY_CACHE_SIZE = int(os.environ.get("USER_SUMMARY_CACHE_SIZE", 4096))
+    USER_SUMMARY_CACHE_TTL = int(os.environ.get("USER_SUMMARY_CACHE_TTL", 30))
\ No newline at end of file
@@ -1,5 +1,34 @@
+from flask import current_app
 from flask_pymongo import PyMongo
 from flask_jwt_extended import JWTManager
+from pymongo import ReadPreference
 
 mongo = PyMongo()
 jwt = JWTManager()
+
+READ_PREFERENCES = {
+    'primary': ReadPreference.PRIMARY,
+    'primaryPreferred': ReadPreference.PRIMARY_PREFERRED,
+    'secondary': ReadPreference.SECONDARY,
+    'secondaryPreferred': ReadPreference.SECONDARY_PREFERRED,
+    'nearest': ReadPreference.NEAREST,
+}
+
+def mongo_client_options(config):
+    """MongoClient keyword arguments for the pool and transport settings in `config`"""
+    options = {
+        'maxPoolSize': config['MONGO_MAX_POOL_SIZE'],
+        'minPoolSize': config['MONGO_MIN_POOL_SIZE'],
+        'serverSelectionTimeoutMS': config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+    }
+    if config['MONGO_WAIT_QUEUE_TIMEOUT_MS']:
+        options['waitQueueTimeoutMS'] = config['MONGO_WAIT_QUEUE_TIMEOUT_MS']
+    compressors = [name.strip() for name in config['MONGO_COMPRESSORS'].split(',') if name.strip()]
+    if compressors:
+        options['compressors'] = compressors
+    return options
+
+def readonly_collection(name):
+    """A collection handle for endpoints that only read, routed by MONGO_READONLY_READ_PREFERENCE"""
+    read_preference = READ_PREFERENCES[current_app.config.get('MONGO_READONLY_READ_PREFERENCE', 'primary')]
+    return mongo.db.get_collection(name, read_preference=read_preference)
@@ -0,0 +1,107 @@
+from typing import Any, Dict, Iterable, Tuple
+
+import numpy as np
+
+# Category i covers values below threshold i (and at or above threshold i - 1)
+BMI_THRESHOLDS = np.array([18.5, 25, 30])
+BMI_CATEGORIES = ('Underweight', 'Normal weight', 'Overweight', 'Obese')
+BFP_THRESHOLDS = {
+    'male': np.array([6, 14, 18, 25]),
+    'female': np.array([14, 21, 25, 32]),
+}
+BFP_CATEGORIES = ('Essential fat', 'Athletes', 'Fitness', 'Average', 'Obese')
+
+BMI_HISTOGRAM_BINS = np.arange(10, 52.5, 2.5)
+BFP_HISTOGRAM_BINS = np.arange(0, 65, 5)
+HEALTH_FIELDS = {'_id': 0, 'weight': 1, 'height': 1, 'age': 1, 'gender': 1}
+
+def _bmi(weight, height):
+    height_in_meters = height / 100
+    return weight / (height_in_meters * height_in_meters)
+
+def _bfp(bmi, age, is_male):
+    return 1.20 * bmi + 0.23 * age - 10.8 * is_male - 5.4
+
+def _bfp_category_index(bfp, is_male):
+    male = np.searchsorted(BFP_THRESHOLDS['male'], bfp, side='right')
+    female = np.searchsorted(BFP_THRESHOLDS['female'], bfp, side='right')
+    return np.where(is_male, male, female)
+
+def user_health_metrics(weight: float, height: float, age: int, gender: str) -> Dict[str, Any]:
+    """BMI, body-fat percentage and their categories for one user"""
+    is_male = gender.lower() == 'male'
+    bmi = _bmi(weight, height)
+    bfp = _bfp(bmi, age, is_male)
+    return {
+        'bmi': bmi,
+        'bfp': bfp,
+        'bmi_category': BMI_CATEGORIES[int(np.searchsorted(BMI_THRESHOLDS, bmi, side='right'))],
+        'bfp_category': BFP_CATEGORIES[int(_bfp_category_index(bfp, is_male))]
+    }
+
+def _load_columns(users: Iterable[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Weight, height, age, is-male and has-gender columns from projected user documents"""
+    weights, heights, ages, genders = [], [], [], []
+    for user in users:
+        weights.append(user.get('weight') or 0)
+        heights.append(user.get('height') or 0)
+        ages.append(user.get('age') or 0)
+        genders.append((user.get('gender') or '').lower())
+    genders = np.array(genders, dtype=str)
+    return (
+        np.array(weights, dtype=float),
+        np.array(heights, dtype=float),
+        np.array(ages, dtype=float),
+        genders == 'male',
+        genders != ''
+    )
+
+def _summary(values: np.ndarray) -> Dict[str, float]:
+    if not values.size:
+        return {}
+    p25, median, p75 = np.percentile(values, [25, 50, 75])
+    return {
+        'mean': round(float(values.mean()), 2),
+        'std': round(float(values.std()), 2),
+        'min': round(float(values.min()), 2),
+        'p25': round(float(p25), 2),
+        'median': round(float(median), 2),
+        'p75': round(float(p75), 2),
+        'max': round(float(values.max()), 2),
+    }
+
+def _histogram(values: np.ndarray, bins: np.ndarray) -> Dict[str, Any]:
+    # Out-of-range values land in the outer bins rather than being dropped
+    counts, edges = np.histogram(np.clip(values, bins[0], bins[-1]), bins=bins)
+    return {'bins': edges.tolist(), 'counts': counts.tolist()}
+
+def cohort_health_metrics(users: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """BMI and body-fat statistics, category counts and histograms for a cohort in one NumPy pass.
+
+    Users missing weight, height, age or gender are counted as excluded, matching
+    the single-user endpoint, which refuses to compute incomplete profiles.
+    """
+    weight, height, age, is_male, has_gender = _load_columns(users)
+    complete = (weight > 0) & (height > 0) & (age > 0) & has_gender
+    total = int(complete.size)
+    weight, height, age, is_male = weight[complete], height[complete], age[complete], is_male[complete]
+
+    bmi = _bmi(weight, height)
+    bfp = _bfp(bmi, age, is_male)
+    bmi_counts = np.bincount(np.searchsorted(BMI_THRESHOLDS, bmi, side='right'), minlength=len(BMI_CATEGORIES))
+    bfp_counts = np.bincount(_bfp_category_index(bfp, is_male), minlength=len(BFP_CATEGORIES))
+
+    return {
+        'users': int(bmi.size),
+        'excluded': total - int(bmi.size),
+        'bmi': {
+            'summary': _summary(bmi),
+            'categories': dict(zip(BMI_CATEGORIES, bmi_counts.tolist())),
+            'histogram': _histogram(bmi, BMI_HISTOGRAM_BINS)
+        },
+        'bfp': {
+            'summary': _summary(bfp),
+            'categories': dict(zip(BFP_CATEGORIES, bfp_counts.tolist())),
+            'histogram': _histogram(bfp, BFP_HISTOGRAM_BINS)
+        }
+    }
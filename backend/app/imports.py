@@ -0,0 +1,135 @@
+import csv
+import json
+import time
+from datetime import datetime
+from typing import IO, Any, Dict, Iterator, List, Tuple
+
+import click
+from flask.cli import with_appcontext
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from .extensions import mongo
+from .services import AGE_GROUPS, DIETARY_PREFERENCES, FITNESS_GOALS
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+PREFERENCE_CHOICES = {
+    'age_group': AGE_GROUPS,
+    'dietary_preference': DIETARY_PREFERENCES,
+    'fitness_goal': FITNESS_GOALS,
+}
+
+def _read_records(stream: IO[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """(line number, raw record) pairs; unparseable NDJSON lines come through as None"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+def _validate_record(record: Any) -> Dict[str, str]:
+    """The preference fields of a record; raise ValueError when a field is missing or unknown"""
+    if not isinstance(record, dict):
+        raise ValueError('not a JSON object')
+    user_id = str(record.get('user_id') or '').strip()
+    if not user_id:
+        raise ValueError('missing user_id')
+    preferences = {'user_id': user_id}
+    for field, choices in PREFERENCE_CHOICES.items():
+        value = str(record.get(field) or '').strip()
+        if value not in choices:
+            raise ValueError(f"{field} must be one of {', '.join(choices)}")
+        preferences[field] = value
+    return preferences
+
+def import_preferences(stream: IO[str], fmt: str, chunk_size: int = 1000, progress=None) -> Dict[str, Any]:
+    """Upsert preferences for every valid record in a CSV or NDJSON stream.
+
+    Records are written in unordered `bulk_write` chunks of `chunk_size`. Invalid
+    records are skipped and reported by line number instead of aborting the load,
+    and re-running an import is harmless since each user's document is upserted.
+    """
+    started = time.perf_counter()
+    stats = {'read': 0, 'inserted': 0, 'updated': 0, 'failed': 0, 'errors': []}
+    chunk: List[UpdateOne] = []
+    chunk_lines: List[int] = []
+
+    for line_number, record in _read_records(stream, fmt):
+        stats['read'] += 1
+        try:
+            preferences = _validate_record(record)
+        except ValueError as e:
+            stats['failed'] += 1
+            stats['errors'].append({'line': line_number, 'error': str(e)})
+            continue
+        chunk.append(_preferences_upsert(preferences))
+        chunk_lines.append(line_number)
+        if len(chunk) >= chunk_size:
+            _write_chunk(chunk, chunk_lines, stats)
+            chunk, chunk_lines = [], []
+            if progress:
+                progress(stats, time.perf_counter() - started)
+    if chunk:
+        _write_chunk(chunk, chunk_lines, stats)
+
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    return stats
+
+def _preferences_upsert(preferences: Dict[str, str]) -> UpdateOne:
+    now = datetime.utcnow()
+    user_id = preferences.pop('user_id')
+    return UpdateOne(
+        {'user_id': user_id},
+        {
+            '$set': dict(preferences, updated_at=now),
+            '$setOnInsert': {'created_at': now},
+            # Bumping the version lets versioned preference caches notice the import
+            '$inc': {'version': 1}
+        },
+        upsert=True
+    )
+
+def _write_chunk(chunk: List[UpdateOne], chunk_lines: List[int], stats: Dict[str, Any]) -> None:
+    try:
+        result = mongo.db.user_preferences.bulk_write(chunk, ordered=False).bulk_api_result
+    except BulkWriteError as e:
+        # With ordered=False every other operation of the chunk is still applied
+        result = e.details
+        for error in result['writeErrors']:
+            stats['errors'].append({'line': chunk_lines[error['index']], 'error': error['errmsg']})
+        stats['failed'] += len(result['writeErrors'])
+    stats['inserted'] += result['nUpserted']
+    stats['updated'] += result['nMatched']
+
+@click.command('import-preferences')
+@click.argument('path', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), default=None,
+              help='Input format; inferred from the file extension when omitted.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Records written per bulk write.')
+@with_appcontext
+def import_preferences_command(path, fmt, chunk_size):
+    """Bulk-load user preferences from a CSV or NDJSON file ('-' reads stdin).
+
+    Each record needs user_id, age_group, dietary_preference and fitness_goal.
+    """
+    if fmt is None:
+        fmt = 'csv' if path.name.lower().endswith('.csv') else 'ndjson'
+
+    def report_progress(stats, elapsed):
+        click.echo(f"{stats['read']} records in {elapsed:.1f}s ({stats['read'] / max(elapsed, 1e-9):.1f} records/s)")
+
+    stats = import_preferences(path, fmt, chunk_size, progress=report_progress)
+    for error in stats['errors'][:20]:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    if len(stats['errors']) > 20:
+        click.echo(f"... and {len(stats['errors']) - 20} more errors", err=True)
+    click.echo(
+        f"Imported {stats['inserted'] + stats['updated']} of {stats['read']} records in {stats['seconds']}s "
+        f"({stats['inserted']} new, {stats['updated']} updated, {stats['failed']} failed)"
+    )
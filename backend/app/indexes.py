@@ -0,0 +1,139 @@
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+import click
+from bson import ObjectId
+from flask.cli import with_appcontext
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import ConnectionFailure, PyMongoError
+from .extensions import mongo
+
+INDEXES = {
+    'users': [
+        IndexModel([('email', ASCENDING)], unique=True, name='email_unique'),
+    ],
+    'user_preferences': [
+        IndexModel([('user_id', ASCENDING)], unique=True, name='user_id_unique'),
+        # Covers the version check of the preferences cache
+        IndexModel([('user_id', ASCENDING), ('version', ASCENDING)], name='user_version'),
+    ],
+    'generated_meal_plans': [
+        # Serves the keyset-paginated history sort on (generated_at, _id)
+        IndexModel([('user_id', ASCENDING), ('generated_at', DESCENDING), ('_id', DESCENDING)],
+                   name='user_generated_at_id'),
+        IndexModel([('user_id', ASCENDING), ('date', ASCENDING)], name='user_date'),
+    ],
+    'meal_plans': [
+        IndexModel([('user_id', ASCENDING), ('date', ASCENDING)], name='user_date'),
+    ],
+    'user_challenges': [
+        IndexModel([('user_id', ASCENDING), ('challenge_id', ASCENDING)], name='user_challenge'),
+    ],
+    'jobs': [
+        IndexModel([('finished_at', ASCENDING)], expireAfterSeconds=7 * 24 * 60 * 60, name='finished_at_ttl'),
+    ],
+}
+
+# Every query issued by a route or job, with representative values, for the explain() audit
+ROUTE_QUERIES: List[Dict[str, Any]] = [
+    {'name': 'login/register by email', 'collection': 'users',
+     'filter': {'email': 'audit@example.com'}},
+    {'name': 'user by id', 'collection': 'users',
+     'filter': {'_id': ObjectId()}},
+    {'name': 'preferences by user', 'collection': 'user_preferences',
+     'filter': {'user_id': 'audit-user'}},
+    {'name': 'preferences version stamp', 'collection': 'user_preferences',
+     'filter': {'user_id': 'audit-user'}, 'projection': {'_id': 0, 'version': 1}},
+    {'name': 'preferences for a batch of users', 'collection': 'user_preferences',
+     'filter': {'user_id': {'$in': ['audit-user', 'audit-user-2']}}},
+    {'name': 'meal plan history', 'collection': 'generated_meal_plans',
+     'filter': {'user_id': 'audit-user', 'generated_at': {'$gte': datetime(2024, 1, 1)}, 'served': {'$ne': False}},
+     'sort': [('generated_at', DESCENDING), ('_id', DESCENDING)]},
+    {'name': 'meal plan history after cursor', 'collection': 'generated_meal_plans',
+     'filter': {'user_id': 'audit-user', 'generated_at': {'$gte': datetime(2024, 1, 1)}, 'served': {'$ne': False},
+                '$or': [{'generated_at': {'$lt': datetime(2024, 1, 5)}},
+                        {'generated_at': datetime(2024, 1, 5), '_id': {'$lt': ObjectId()}}]},
+     'sort': [('generated_at', DESCENDING), ('_id', DESCENDING)]},
+    {'name': 'precomputed meal plan', 'collection': 'generated_meal_plans',
+     'filter': {'user_id': 'audit-user', 'date': datetime(2024, 1, 1), 'precomputed': True,
+                'preferences.age_group': 'adult', 'preferences.dietary_preference': 'vegetarian',
+                'preferences.fitness_goal': 'stay_fit'}},
+    {'name': 'manual meal plans by date', 'collection': 'meal_plans',
+     'filter': {'user_id': 'audit-user', 'date': datetime(2024, 1, 1)}},
+    {'name': 'manual meal plans in a date range', 'collection': 'meal_plans',
+     'filter': {'user_id': 'audit-user', 'date': {'$gte': datetime(2024, 1, 1), '$lte': datetime(2024, 1, 31)}},
+     'sort': [('date', ASCENDING)]},
+    {'name': 'manual meal plan by id', 'collection': 'meal_plans',
+     'filter': {'_id': ObjectId(), 'user_id': 'audit-user'}},
+    {'name': 'manual meal plans owned, for a bulk write', 'collection': 'meal_plans',
+     'filter': {'_id': {'$in': [ObjectId(), ObjectId()]}, 'user_id': 'audit-user'}},
+    {'name': 'user challenges', 'collection': 'user_challenges',
+     'filter': {'user_id': 'audit-user'}},
+    {'name': 'user challenge by id', 'collection': 'user_challenges',
+     'filter': {'_id': ObjectId(), 'user_id': 'audit-user'}},
+    {'name': 'job by id', 'collection': 'jobs',
+     'filter': {'_id': ObjectId(), 'user_id': 'audit-user'}},
+]
+
+def ensure_indexes(db) -> bool:
+    """Create the declared indexes; existing identical indexes are left untouched.
+
+    Returns False when the database is unreachable, so the caller can retry later.
+    """
+    for collection, indexes in INDEXES.items():
+        try:
+            db[collection].create_indexes(indexes)
+        except ConnectionFailure as e:
+            print(f"Index creation skipped, database unreachable: {str(e)}")
+            return False
+        except PyMongoError as e:
+            print(f"Index creation error on {collection}: {str(e)}")
+    return True
+
+def _plan_stages(plan: Any) -> Iterator[str]:
+    """Every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+def audit_queries(db) -> List[Dict[str, Any]]:
+    """Explain every route query and report the stages of its winning plan"""
+    report = []
+    for query in ROUTE_QUERIES:
+        command = {'find': query['collection'], 'filter': query['filter']}
+        if query.get('projection'):
+            command['projection'] = query['projection']
+        if query.get('sort'):
+            command['sort'] = dict(query['sort'])
+        explanation = db.command('explain', command, verbosity='queryPlanner')
+        stages = list(_plan_stages(explanation['queryPlanner']['winningPlan']))
+        report.append({
+            'name': query['name'],
+            'collection': query['collection'],
+            'stages': stages,
+            'collscan': 'COLLSCAN' in stages
+        })
+    return report
+
+@click.command('audit-indexes')
+@click.option('--no-create', is_flag=True, help='Audit without creating the declared indexes first.')
+@with_appcontext
+def audit_indexes_command(no_create):
+    """Explain every route query and fail if any of them scans a whole collection."""
+    if not no_create:
+        ensure_indexes(mongo.db)
+
+    failures = 0
+    for entry in audit_queries(mongo.db):
+        status = 'COLLSCAN' if entry['collscan'] else 'ok'
+        failures += entry['collscan']
+        click.echo(f"{status:<8} {entry['collection']:<22} {entry['name']:<36} {' > '.join(entry['stages'])}")
+
+    if failures:
+        raise click.ClickException(f'{failures} route queries run as collection scans')
+    click.echo('All route queries use an index.')
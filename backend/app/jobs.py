@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from bson import ObjectId
+from .extensions import mongo
+
+class JobQueueFull(Exception):
+    """Raised when every worker is busy and the job queue is at capacity"""
+
+class JobRunner:
+    """Bounded worker pool for background jobs whose status is persisted in Mongo for polling.
+
+    Status lives in the `jobs` collection rather than in memory so that any
+    worker process can answer a poll, while the pool bounds the work queued
+    in this process.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[threading.BoundedSemaphore] = None
+
+    def init_app(self, app) -> None:
+        workers = app.config.get('JOB_WORKERS', 4)
+        queue_depth = app.config.get('JOB_QUEUE_DEPTH', 100)
+        self.app = app
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job-worker')
+        # A slot is held from submission until the job finishes: running jobs plus queued ones
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+
+    def submit(self, user_id: str, job_type: str, fn: Callable[..., Dict[str, Any]], *args: Any) -> str:
+        """Queue `fn(*args)` and return the job id; raise JobQueueFull when no slot is free"""
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull()
+        try:
+            job = {
+                'user_id': user_id,
+                'type': job_type,
+                'status': 'queued',
+                'submitted_at': datetime.utcnow(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None
+            }
+            job_id = mongo.db.jobs.insert_one(job).inserted_id
+            self._executor.submit(self._run, job_id, fn, args)
+        except Exception:
+            self._slots.release()
+            raise
+        return str(job_id)
+
+    def get(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a job owned by the given user"""
+        if not ObjectId.is_valid(job_id):
+            return None
+        return mongo.db.jobs.find_one({'_id': ObjectId(job_id), 'user_id': user_id})
+
+    def _run(self, job_id: ObjectId, fn: Callable[..., Dict[str, Any]], args: tuple) -> None:
+        try:
+            with self.app.app_context():
+                mongo.db.jobs.update_one(
+                    {'_id': job_id},
+                    {'$set': {'status': 'running', 'started_at': datetime.utcnow()}}
+                )
+                try:
+                    result = fn(*args)
+                except Exception as e:
+                    print(f"Job {job_id} error: {str(e)}")
+                    update = {'status': 'failed', 'error': str(e)}
+                else:
+                    update = {'status': 'succeeded', 'result': result}
+                update['finished_at'] = datetime.utcnow()
+                mongo.db.jobs.update_one({'_id': job_id}, {'$set': update})
+        finally:
+            self._slots.release()
+
+job_runner = JobRunner()
@@ -0,0 +1,57 @@
+from datetime import date, datetime
+from typing import Any
+
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+def _encode_bson(value: Any) -> Any:
+    """Encode the BSON values documents come back with: ObjectId as hex, dates as ISO 8601"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+class BSONJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes Mongo documents as they come, so routes can return them directly.
+
+    Uses orjson when it is installed and the standard library encoder otherwise;
+    both produce the same JSON for the values documents contain.
+    """
+
+    @staticmethod
+    def default(value: Any) -> Any:
+        try:
+            return _encode_bson(value)
+        except TypeError:
+            return DefaultJSONProvider.default(value)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj).decode()
+
+    def response(self, *args: Any, **kwargs: Any):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._orjson_dumps(obj) + b'\n', mimetype=self.mimetype)
+
+    def compact_dumps(self, obj: Any) -> str:
+        """Single-line JSON regardless of debug mode, e.g. for NDJSON streams"""
+        if orjson is None:
+            return super().dumps(obj, indent=None, separators=(',', ':'))
+        return self._orjson_dumps(obj, indent=False).decode()
+
+    def _orjson_dumps(self, obj: Any, indent: bool = True) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent and (self.compact is False or (self.compact is None and self._app.debug)):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict
+
+from pymongo import monitoring
+
+def _percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection checkout waits and pool exhaustion, for sizing the pool against worker counts.
+
+    A checkout runs on the requesting thread from start to success or failure, so
+    the start time is kept per thread. Wait times are summarized from a bounded
+    window of recent checkouts.
+    """
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._waits_ms: Deque[float] = deque(maxlen=window)
+        self.checkouts = 0
+        self.checkout_failures: Counter = Counter()
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.pool_clears = 0
+
+    def connection_check_out_started(self, event) -> None:
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event) -> None:
+        waited_ms = (time.perf_counter() - getattr(self._local, 'started', time.perf_counter())) * 1000
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self._waits_ms.append(waited_ms)
+
+    def connection_check_out_failed(self, event) -> None:
+        # A 'timeout' reason means every connection was busy for waitQueueTimeoutMS
+        with self._lock:
+            self.checkout_failures[str(event.reason)] += 1
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self.connections_closed += 1
+
+    def pool_cleared(self, event) -> None:
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = list(self._waits_ms)
+            return {
+                'checkouts': self.checkouts,
+                'checkout_failures': dict(self.checkout_failures),
+                'checked_out': self.checked_out,
+                'max_checked_out': self.max_checked_out,
+                'connections_open': self.connections_created - self.connections_closed,
+                'pool_clears': self.pool_clears,
+                'wait_ms': {
+                    'p50': round(_percentile(waits, 0.5), 3),
+                    'p95': round(_percentile(waits, 0.95), 3),
+                    'max': round(max(waits, default=0.0), 3),
+                }
+            }
+
+class CommandMetrics(monitoring.CommandListener):
+    """Per-command counts, failures and server round-trip times"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._commands: Dict[str, Dict[str, float]] = {}
+
+    def _record(self, event, failed: bool) -> None:
+        duration_ms = event.duration_micros / 1000
+        with self._lock:
+            entry = self._commands.setdefault(
+                event.command_name, {'count': 0, 'failures': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['count'] += 1
+            entry['failures'] += failed
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+
+    def started(self, event) -> None:
+        pass
+
+    def succeeded(self, event) -> None:
+        self._record(event, failed=False)
+
+    def failed(self, event) -> None:
+        self._record(event, failed=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                name: {
+                    'count': entry['count'],
+                    'failures': entry['failures'],
+                    'avg_ms': round(entry['total_ms'] / entry['count'], 3),
+                    'max_ms': round(entry['max_ms'], 3),
+                }
+                for name, entry in self._commands.items()
+            }
+
+pool_metrics = PoolMetrics()
+command_metrics = CommandMetrics()
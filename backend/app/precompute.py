@@ -0,0 +1,128 @@
+import time
+from datetime import datetime, timedelta, date
+from typing import Any, Dict, List
+
+import click
+from flask.cli import with_appcontext
+from pymongo import UpdateOne
+from .extensions import mongo
+from .services import meal_generation_service, derive_seed
+
+PREFERENCE_KEYS = ('age_group', 'dietary_preference', 'fitness_goal')
+PREFERENCE_FIELDS = {'user_id': 1, **{key: 1 for key in PREFERENCE_KEYS}}
+
+def plan_day(day: date) -> datetime:
+    """Midnight (UTC) timestamp under which a day's precomputed plan is stored"""
+    return datetime.combine(day, datetime.min.time())
+
+def generated_for(preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """Filter matching a precomputed plan only if it was generated for these preferences"""
+    return {f'preferences.{key}': preferences[key] for key in PREFERENCE_KEYS}
+
+def precompute_meal_plans(target_day: date, chunk_size: int = 1000, restart: bool = False,
+                          progress=None) -> Dict[str, Any]:
+    """Generate and store every user's plan for `target_day`.
+
+    Users are streamed in `_id` order and the last `_id` of each written chunk is
+    checkpointed, so a crashed run resumes where it stopped. Re-writing a chunk is
+    harmless: plans are upserted per (user_id, date) and seeded per user and day.
+
+    Each plan records the preferences it was generated for, and stays out of the
+    user's history (`served: False`) until the user first asks for it.
+    """
+    checkpoint_id = f'precompute-meal-plans:{target_day.isoformat()}'
+    if restart:
+        mongo.db.job_checkpoints.delete_one({'_id': checkpoint_id})
+    checkpoint = mongo.db.job_checkpoints.find_one({'_id': checkpoint_id}) or {}
+    if checkpoint.get('completed'):
+        return {'date': target_day.isoformat(), 'users': 0, 'seconds': 0.0,
+                'users_per_second': 0.0, 'resumed': False, 'already_completed': True}
+
+    query = {'_id': {'$gt': checkpoint['last_id']}} if checkpoint.get('last_id') else {}
+    cursor = mongo.db.user_preferences.find(query, PREFERENCE_FIELDS).sort('_id', 1).batch_size(chunk_size)
+
+    started = time.perf_counter()
+    processed = 0
+    chunk: List[Dict[str, Any]] = []
+    for preferences in cursor:
+        chunk.append(preferences)
+        if len(chunk) >= chunk_size:
+            processed += _write_chunk(chunk, target_day, checkpoint_id)
+            chunk = []
+            if progress:
+                progress(processed, time.perf_counter() - started)
+    if chunk:
+        processed += _write_chunk(chunk, target_day, checkpoint_id)
+
+    mongo.db.job_checkpoints.update_one(
+        {'_id': checkpoint_id},
+        {'$set': {'completed': True, 'completed_at': datetime.utcnow()}},
+        upsert=True
+    )
+    elapsed = time.perf_counter() - started
+    return {
+        'date': target_day.isoformat(),
+        'users': processed,
+        'seconds': round(elapsed, 3),
+        'users_per_second': round(processed / elapsed, 1) if elapsed > 0 else 0.0,
+        'resumed': bool(checkpoint.get('last_id')),
+        'already_completed': False
+    }
+
+def _write_chunk(chunk: List[Dict[str, Any]], target_day: date, checkpoint_id: str) -> int:
+    """Generate plans for a chunk of users, bulk-upsert them and advance the checkpoint"""
+    meal_plans = meal_generation_service.generate_meal_plans([
+        (
+            preferences['age_group'],
+            preferences['dietary_preference'],
+            preferences['fitness_goal'],
+            derive_seed(preferences['user_id'], target_day)
+        )
+        for preferences in chunk
+    ])
+
+    generated_at = datetime.utcnow()
+    plan_date = plan_day(target_day)
+    mongo.db.generated_meal_plans.bulk_write([
+        UpdateOne(
+            {'user_id': preferences['user_id'], 'date': plan_date, 'precomputed': True},
+            {'$set': {
+                'breakfast': meal_plan['breakfast'],
+                'lunch': meal_plan['lunch'],
+                'dinner': meal_plan['dinner'],
+                'preferences': {key: preferences[key] for key in PREFERENCE_KEYS},
+                'generated_at': generated_at
+            }, '$setOnInsert': {'served': False}},
+            upsert=True
+        )
+        for preferences, meal_plan in zip(chunk, meal_plans)
+    ], ordered=False)
+
+    mongo.db.job_checkpoints.update_one(
+        {'_id': checkpoint_id},
+        {'$set': {'last_id': chunk[-1]['_id'], 'updated_at': generated_at}, '$inc': {'processed': len(chunk)}},
+        upsert=True
+    )
+    return len(chunk)
+
+@click.command('precompute-meal-plans')
+@click.option('--date', 'target', default=None, help='Day to plan for (YYYY-MM-DD); defaults to tomorrow (UTC).')
+@click.option('--chunk-size', default=1000, show_default=True, help='Users generated and written per bulk write.')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint of a previous run for the same day.')
+@with_appcontext
+def precompute_meal_plans_command(target, chunk_size, restart):
+    """Precompute every user's meal plan for the next day."""
+    target_day = (datetime.strptime(target, '%Y-%m-%d').date() if target
+                  else datetime.utcnow().date() + timedelta(days=1))
+
+    def report_progress(processed, elapsed):
+        click.echo(f'{processed} users in {elapsed:.1f}s ({processed / max(elapsed, 1e-9):.1f} users/s)')
+
+    stats = precompute_meal_plans(target_day, chunk_size, restart, progress=report_progress)
+    if stats['already_completed']:
+        click.echo(f"Plans for {stats['date']} were already precomputed; use --restart to run again.")
+        return
+    click.echo(
+        f"Precomputed {stats['users']} plans for {stats['date']} in {stats['seconds']}s "
+        f"({stats['users_per_second']} users/s){' after resuming' if stats['resumed'] else ''}"
+    )
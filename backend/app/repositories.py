@@ -0,0 +1,192 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from flask import g
+from .cache import TTLCache
+from .extensions import mongo, readonly_collection
+from .health_metrics import HEALTH_FIELDS
+
+class UserRepository:
+    """User document reads that only transfer the fields an endpoint needs.
+
+    The `badges` and `milestones` arrays grow with every award, so they are never
+    fetched just to be counted, and can be paged with `$slice` on the server.
+    Award and progress reads may go to a secondary (MONGO_READONLY_READ_PREFERENCE).
+
+    The full user document is loaded at most once per request (memoized on
+    `flask.g`), and progress summaries are kept in a short-TTL cache that award
+    writes invalidate.
+    """
+
+    # `$slice` needs a positive count; an offset without a limit takes the rest of the array
+    UNBOUNDED = 2 ** 31 - 1
+
+    HEALTH_PROJECTION = HEALTH_FIELDS
+    FIRST_USER_MARKER = 'first_user'
+
+    def __init__(self):
+        # Once this process knows the first user exists, registration skips the marker entirely
+        self._first_user_claimed = False
+        self.summary_cache = TTLCache(4096, 30)
+
+    def init_app(self, app) -> None:
+        self.summary_cache.configure(
+            app.config.get('USER_SUMMARY_CACHE_SIZE', self.summary_cache.maxsize),
+            app.config.get('USER_SUMMARY_CACHE_TTL', self.summary_cache.ttl),
+        )
+        self.summary_cache.clear()
+        self._first_user_claimed = False
+
+    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """The user document without the password hash, loaded once per request"""
+        users = g.setdefault('_loaded_users', {})
+        if user_id not in users:
+            users[user_id] = mongo.db.users.find_one({'_id': ObjectId(user_id)}, {'password': 0})
+        user = users[user_id]
+        return dict(user) if user is not None else None
+
+    def invalidate(self, user_id: str) -> None:
+        """Forget cached reads of a user after a write to their document"""
+        self.summary_cache.pop(user_id)
+        g.get('_loaded_users', {}).pop(user_id, None)
+
+    def is_admin(self, user_id: str) -> bool:
+        """The first registered user is the admin (flagged in `created_at`)"""
+        user = self.get_user(user_id)
+        return user is not None and user.get('created_at') is True
+
+    def seed_first_user_marker(self, db) -> None:
+        """Mark the first user as taken on a database that already has users.
+
+        Runs once per process before requests are served (see DatabaseBootstrap),
+        never during registration, so it cannot race a first user's claim.
+        """
+        if db.users.find_one({}, {'_id': 1}) is not None:
+            db.app_state.update_one(
+                {'_id': self.FIRST_USER_MARKER},
+                {'$setOnInsert': {'claimed_at': datetime.utcnow()}},
+                upsert=True
+            )
+            self._first_user_claimed = True
+
+    def claim_first_user(self, user_id: ObjectId) -> bool:
+        """True for exactly one inserted user: whichever creates the marker document"""
+        if self._first_user_claimed:
+            return False
+        result = mongo.db.app_state.update_one(
+            {'_id': self.FIRST_USER_MARKER},
+            {'$setOnInsert': {'claimed_at': datetime.utcnow(), 'user_id': user_id}},
+            upsert=True
+        )
+        self._first_user_claimed = True
+        return result.upserted_id is not None
+
+    def get_health_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        loaded = g.get('_loaded_users', {})
+        if user_id in loaded:
+            user = loaded[user_id]
+            return {field: user.get(field) for field in self.HEALTH_PROJECTION if field != '_id'} if user else None
+        return mongo.db.users.find_one({'_id': ObjectId(user_id)}, self.HEALTH_PROJECTION)
+
+    def get_progress(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Level, experience and award counts, from the summary cache or computed server-side"""
+        summary = self.summary_cache.get(user_id)
+        if summary is None:
+            summary = self._load_progress(user_id)
+            if summary is None:
+                return None
+            self.summary_cache.set(user_id, summary)
+        return dict(summary)
+
+    def _load_progress(self, user_id: str) -> Optional[Dict[str, Any]]:
+        results = list(readonly_collection('users').aggregate([
+            {'$match': {'_id': ObjectId(user_id)}},
+            {'$project': {
+                '_id': 0,
+                'level': {'$ifNull': ['$level', 1]},
+                'experience': {'$ifNull': ['$experience', 0]},
+                'badges_count': {'$size': {'$ifNull': ['$badges', []]}},
+                'milestones_count': {'$size': {'$ifNull': ['$milestones', []]}}
+            }}
+        ]))
+        return results[0] if results else None
+
+    def get_badges(self, user_id: str, offset: int = 0,
+                   limit: Optional[int] = None) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        return self._get_awards(user_id, 'badges', offset, limit)
+
+    def get_milestones(self, user_id: str, offset: int = 0,
+                       limit: Optional[int] = None) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        return self._get_awards(user_id, 'milestones', offset, limit)
+
+    def _get_awards(self, user_id: str, field: str, offset: int,
+                    limit: Optional[int]) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """A page of an award array and the array's total length, or None if the user does not exist"""
+        awards = {'$ifNull': [f'${field}', []]}
+        page = awards
+        if limit is not None or offset:
+            page = {'$slice': [awards, offset, limit or self.UNBOUNDED]}
+
+        results = list(readonly_collection('users').aggregate([
+            {'$match': {'_id': ObjectId(user_id)}},
+            {'$project': {'_id': 0, 'items': page, 'total': {'$size': awards}}}
+        ]))
+        if not results:
+            return None
+        return results[0]['items'], results[0]['total']
+
+class PreferencesRepository:
+    """Cached reads of `user_preferences`, which change far less often than meal plans are generated.
+
+    Entries expire after a TTL, and writes through this process drop their entry.
+    With `versioned` on, every preferences write bumps a `version` field and a hit
+    is confirmed with a covered query on (user_id, version), so a write made by
+    another process is noticed at once instead of after the TTL.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = 300, versioned: bool = False):
+        self.cache = TTLCache(maxsize, ttl)
+        self.versioned = versioned
+        self.stale = 0
+
+    def init_app(self, app) -> None:
+        self.cache.configure(
+            app.config.get('PREFERENCES_CACHE_SIZE', self.cache.maxsize),
+            app.config.get('PREFERENCES_CACHE_TTL', self.cache.ttl),
+        )
+        self.versioned = app.config.get('PREFERENCES_CACHE_VERSIONED', self.versioned)
+        self.cache.clear()
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """A user's preferences document, or None; callers get their own copy"""
+        preferences = self.cache.get(user_id)
+        if preferences is not None and self.versioned and self._current_version(user_id) != preferences.get('version'):
+            self.stale += 1
+            preferences = None
+        if preferences is None:
+            preferences = mongo.db.user_preferences.find_one({'user_id': user_id})
+            if preferences is None:
+                return None
+            self.cache.set(user_id, preferences)
+        return dict(preferences)
+
+    def refresh(self, user_id: str, preferences: Dict[str, Any]) -> None:
+        """Store the document a write just returned, sparing the next read a round trip"""
+        self.cache.set(user_id, dict(preferences))
+
+    def invalidate(self, user_id: str) -> None:
+        self.cache.pop(user_id)
+
+    def _current_version(self, user_id: str) -> Optional[int]:
+        stamp = mongo.db.user_preferences.find_one({'user_id': user_id}, {'_id': 0, 'version': 1})
+        return stamp.get('version') if stamp else None
+
+    def cache_stats(self) -> Dict[str, Any]:
+        stats = self.cache.stats()
+        stats['versioned'] = self.versioned
+        stats['stale'] = self.stale
+        return stats
+
+user_repository = UserRepository()
+preferences_repository = PreferencesRepository()
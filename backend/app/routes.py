@@ -1,9 +1,24 @@
-from flask import Blueprint, request, jsonify
+import base64
+import binascii
+import json
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from bson import ObjectId
-from .extensions import mongo
-from .services import meal_generation_service
+from bson.errors import InvalidId
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from .challenge_progress import (
+    new_progress, decode_progress, day_bit, complete_day_pipeline, award_completion_pipeline,
+    migrate_legacy_challenge
+)
+from .extensions import mongo, readonly_collection
+from .jobs import job_runner, JobQueueFull
+from .monitoring import pool_metrics, command_metrics
+from .precompute import plan_day, generated_for
+from .repositories import user_repository, preferences_repository
+from .services import meal_generation_service, derive_seed
+from .streaming import wants_ndjson, ndjson_response
 
 predefined_challenges = [ 
     {"_id": "1", "name": "7-Day Push-up Power", "details": "Do push-ups daily for a week.", "type": "7-Day", "duration": 7, "lvl": "Easy", "xp": 50},  
@@ -36,31 +51,24 @@ def set_user_preferences():
     user_id = get_jwt_identity()
     data = request.get_json()
     
-    preferences = {
-        'user_id': user_id,
-        'age_group': data['age_group'],
-        'dietary_preference': data['dietary_preference'],
-        'fitness_goal': data['fitness_goal'],
-        'created_at': datetime.utcnow(),
-        'updated_at': datetime.utcnow()
-    }
+    now = datetime.utcnow()
     
-    existing_preferences = mongo.db.user_preferences.find_one({'user_id': user_id})
-    
-    if existing_preferences:
-        result = mongo.db.user_preferences.update_one(
-            {'user_id': user_id},
-            {'$set': {
+    preferences = mongo.db.user_preferences.find_one_and_update(
+        {'user_id': user_id},
+        {
+            '$set': {
                 'age_group': data['age_group'],
                 'dietary_preference': data['dietary_preference'],
                 'fitness_goal': data['fitness_goal'],
-                'updated_at': datetime.utcnow()
-            }}
-        )
-        preferences['_id'] = str(existing_preferences['_id'])
-    else:
-        result = mongo.db.user_preferences.insert_one(preferences)
-        preferences['_id'] = str(result.inserted_id)
+                'updated_at': now
+            },
+            '$setOnInsert': {'created_at': now},
+            '$inc': {'version': 1}
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    preferences_repository.refresh(user_id, preferences)
     
     return jsonify({'success': True, 'preferences': preferences}), 201
 
@@ -69,29 +77,19 @@ def set_user_preferences():
 def get_user_preferences():
     user_id = get_jwt_identity()
     
-    preferences = mongo.db.user_preferences.find_one({'user_id': user_id})
+    preferences = preferences_repository.get(user_id)
     if not preferences:
         return jsonify({'success': False, 'error': 'Preferences not found'}), 404
 
-    preferences['_id'] = str(preferences['_id'])
-    preferences['created_at'] = preferences['created_at'].isoformat()
-    preferences['updated_at'] = preferences['updated_at'].isoformat()
-
     return jsonify({'success': True, 'preferences': preferences}), 200
 
-@preferences_bp.route('/generate-meal-plan', methods=['POST'])
-@jwt_required()
-def generate_meal_plan():
-    user_id = get_jwt_identity()
-    
-    user_preferences = mongo.db.user_preferences.find_one({'user_id': user_id})
-    if not user_preferences:
-        return jsonify({'success': False, 'error': 'Please set your preferences first'}), 400
-    
+def _generate_and_save_meal_plan(user_id, user_preferences):
+    """Run the optimizer for a user and store the result in generated_meal_plans"""
     meal_plan = meal_generation_service.generate_meal_plan(
         user_preferences['age_group'],
         user_preferences['dietary_preference'],
-        user_preferences['fitness_goal']  
+        user_preferences['fitness_goal'],
+        seed=derive_seed(user_id, datetime.utcnow().date())
     )
     
     meal_plan_data = {
@@ -104,39 +102,278 @@ def generate_meal_plan():
     }
     
     result = mongo.db.generated_meal_plans.insert_one(meal_plan_data)
-    meal_plan_data['_id'] = str(result.inserted_id)
+    
+    return {'meal_plan': meal_plan, 'saved_plan_id': str(result.inserted_id)}
+
+@preferences_bp.route('/generate-meal-plan', methods=['POST'])
+@jwt_required()
+def generate_meal_plan():
+    user_id = get_jwt_identity()
+    
+    user_preferences = preferences_repository.get(user_id)
+    if not user_preferences:
+        return jsonify({'success': False, 'error': 'Please set your preferences first'}), 400
+    
+    # A plan precomputed for preferences the user has since changed is ignored
+    precomputed = mongo.db.generated_meal_plans.find_one_and_update(
+        {
+            'user_id': user_id,
+            'date': plan_day(datetime.utcnow().date()),
+            'precomputed': True,
+            **generated_for(user_preferences)
+        },
+        {'$set': {'served': True}}
+    )
+    if precomputed:
+        return jsonify({
+            'success': True,
+            'meal_plan': {
+                'breakfast': precomputed['breakfast'],
+                'lunch': precomputed['lunch'],
+                'dinner': precomputed['dinner'],
+                'generated_at': precomputed['generated_at'],
+                'precomputed': True
+            },
+            'saved_plan_id': str(precomputed['_id'])
+        }), 200
+    
+    if request.args.get('mode') == 'job':
+        try:
+            job_id = job_runner.submit(user_id, 'generate_meal_plan', _generate_and_save_meal_plan, user_id, user_preferences)
+        except JobQueueFull:
+            return jsonify({'success': False, 'error': 'Meal plan queue is full, please retry shortly'}), 503
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/api/meal-plan-jobs/{job_id}'
+        }), 202
+    
+    generated = _generate_and_save_meal_plan(user_id, user_preferences)
     
     return jsonify({
         'success': True, 
-        'meal_plan': meal_plan,
-        'saved_plan_id': meal_plan_data['_id']
+        'meal_plan': generated['meal_plan'],
+        'saved_plan_id': generated['saved_plan_id']
     }), 201
 
+@preferences_bp.route('/generate-meal-plan/batch', methods=['POST'])
+@jwt_required()
+def generate_meal_plan_batch():
+    user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    
+    user_ids = data.get('user_ids', [user_id])
+    days = data.get('days', 1)
+    max_items = current_app.config['MEAL_BATCH_MAX_ITEMS']
+    
+    if not isinstance(user_ids, list):
+        return jsonify({'success': False, 'error': 'user_ids must be a list'}), 400
+    user_ids = [str(uid) for uid in user_ids]
+    # Only the admin may generate (and read back) plans for other users
+    if any(uid != user_id for uid in user_ids) and not user_repository.is_admin(user_id):
+        return jsonify({'success': False, 'error': 'Admin access required to generate plans for other users'}), 403
+    if not isinstance(days, int) or days < 1:
+        return jsonify({'success': False, 'error': 'days must be a positive integer'}), 400
+    if not user_ids:
+        return jsonify({'success': False, 'error': 'user_ids must not be empty'}), 400
+    if len(user_ids) * days > max_items:
+        return jsonify({'success': False, 'error': f'A batch may contain at most {max_items} plans'}), 400
+    
+    preferences_by_user = {
+        prefs['user_id']: prefs
+        for prefs in mongo.db.user_preferences.find({'user_id': {'$in': user_ids}})
+    }
+    missing_preferences = [uid for uid in user_ids if uid not in preferences_by_user]
+    
+    start = datetime.utcnow()
+    targets = []
+    plan_requests = []
+    for uid in user_ids:
+        prefs = preferences_by_user.get(uid)
+        if not prefs:
+            continue
+        for offset in range(days):
+            plan_date = start + timedelta(days=offset)
+            targets.append((uid, plan_date))
+            plan_requests.append((
+                prefs['age_group'],
+                prefs['dietary_preference'],
+                prefs['fitness_goal'],
+                derive_seed(uid, plan_date.date())
+            ))
+    
+    meal_plans = meal_generation_service.generate_meal_plans(plan_requests)
+    
+    documents = [
+        {
+            'user_id': uid,
+            'date': plan_date,
+            'breakfast': meal_plan['breakfast'],
+            'lunch': meal_plan['lunch'],
+            'dinner': meal_plan['dinner'],
+            'generated_at': start
+        }
+        for (uid, plan_date), meal_plan in zip(targets, meal_plans)
+    ]
+    inserted_ids = mongo.db.generated_meal_plans.insert_many(documents).inserted_ids if documents else []
+    
+    results = [
+        {
+            'user_id': uid,
+            'date': plan_date.isoformat(),
+            'meal_plan': meal_plan,
+            'saved_plan_id': str(inserted_id)
+        }
+        for (uid, plan_date), meal_plan, inserted_id in zip(targets, meal_plans, inserted_ids)
+    ]
+    
+    return jsonify({
+        'success': True,
+        'meal_plans': results,
+        'missing_preferences': missing_preferences
+    }), 201
+
+@preferences_bp.route('/generate-meal-plan/week', methods=['POST'])
+@jwt_required()
+def generate_weekly_meal_plan():
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    
+    days = data.get('days', 7)
+    repeat_window = data.get('repeat_window')
+    if not isinstance(days, int) or not 1 <= days <= 31:
+        return jsonify({'success': False, 'error': 'days must be an integer between 1 and 31'}), 400
+    if repeat_window is not None and (not isinstance(repeat_window, int) or repeat_window < 0):
+        return jsonify({'success': False, 'error': 'repeat_window must be a non-negative integer'}), 400
+    
+    user_preferences = preferences_repository.get(user_id)
+    if not user_preferences:
+        return jsonify({'success': False, 'error': 'Please set your preferences first'}), 400
+    
+    start = datetime.utcnow()
+    weekly_plan = meal_generation_service.generate_weekly_meal_plan(
+        user_preferences['age_group'],
+        user_preferences['dietary_preference'],
+        user_preferences['fitness_goal'],
+        days=days,
+        repeat_window=repeat_window,
+        seed=derive_seed(user_id, start.date())
+    )
+    
+    documents = [
+        {
+            'user_id': user_id,
+            'date': start + timedelta(days=offset),
+            'breakfast': day_plan['breakfast'],
+            'lunch': day_plan['lunch'],
+            'dinner': day_plan['dinner'],
+            'generated_at': start
+        }
+        for offset, day_plan in enumerate(weekly_plan['days'])
+    ]
+    result = mongo.db.generated_meal_plans.insert_many(documents)
+    
+    return jsonify({
+        'success': True,
+        'weekly_plan': weekly_plan,
+        'saved_plan_ids': [str(inserted_id) for inserted_id in result.inserted_ids]
+    }), 201
+
+@preferences_bp.route('/meal-plan-jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_meal_plan_job(job_id):
+    user_id = get_jwt_identity()
+    
+    job = job_runner.get(job_id, user_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    return jsonify({'success': True, 'job': job}), 200
+
+@preferences_bp.route('/meal-generation/stats', methods=['GET'])
+@jwt_required()
+def get_meal_generation_stats():
+    return jsonify({
+        'success': True,
+        'plan_cache': meal_generation_service.cache_stats(),
+        'preferences_cache': preferences_repository.cache_stats()
+    }), 200
+
+@preferences_bp.route('/mongo/stats', methods=['GET'])
+@jwt_required()
+def get_mongo_stats():
+    if not user_repository.is_admin(get_jwt_identity()):
+        return jsonify({'success': False, 'error': 'Admin access required'}), 403
+    
+    return jsonify({
+        'success': True,
+        'pool': pool_metrics.stats(),
+        'commands': command_metrics.stats()
+    }), 200
+
+HISTORY_PAGE_SIZE = 20
+MAX_HISTORY_PAGE_SIZE = 100
+
+def _encode_history_cursor(plan):
+    """Opaque cursor pointing just past `plan` in (generated_at, _id) descending order"""
+    key = json.dumps([plan['generated_at'].isoformat(), str(plan['_id'])])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+def _decode_history_cursor(cursor):
+    """Inverse of _encode_history_cursor; raise ValueError on a malformed cursor"""
+    try:
+        generated_at, plan_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(generated_at), ObjectId(plan_id)
+    except (TypeError, ValueError, InvalidId, binascii.Error):
+        raise ValueError('Invalid cursor')
+
 @preferences_bp.route('/meal-plans/history', methods=['GET'])
 @jwt_required()
 def get_meal_plan_history():
     user_id = get_jwt_identity()
     
+    limit = request.args.get('limit', HISTORY_PAGE_SIZE, type=int)
+    if not 1 <= limit <= MAX_HISTORY_PAGE_SIZE:
+        return jsonify({'success': False, 'error': f'limit must be between 1 and {MAX_HISTORY_PAGE_SIZE}'}), 400
+    
     x = datetime.utcnow() - timedelta(days=7)
     
-    meal_plans = list(mongo.db.generated_meal_plans.find({
+    query = {
         'user_id': user_id,
-        'generated_at': {'$gte': x}
-    }).sort('generated_at', -1))
-    
-    for plan in meal_plans:
-        plan['_id'] = str(plan['_id'])
-        plan['date'] = plan['date'].isoformat()
-        plan['generated_at'] = plan['generated_at'].isoformat()
-    
-    return jsonify({'success': True, 'meal_plans': meal_plans}), 200
+        'generated_at': {'$gte': x},
+        # Precomputed plans join the history once they have been served
+        'served': {'$ne': False}
+    }
+    if request.args.get('cursor'):
+        try:
+            generated_at, plan_id = _decode_history_cursor(request.args['cursor'])
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        # Keyset continuation: strictly after the last plan of the previous page
+        query['$or'] = [
+            {'generated_at': {'$lt': generated_at}},
+            {'generated_at': generated_at, '_id': {'$lt': plan_id}}
+        ]
+    
+    sort = [('generated_at', -1), ('_id', -1)]
+    if wants_ndjson():
+        # A stream holds one document at a time, so it covers the whole window without a page cap
+        return ndjson_response(readonly_collection('generated_meal_plans').find(query).sort(sort))
+    
+    # One extra document tells whether another page exists
+    meal_plans = list(readonly_collection('generated_meal_plans').find(query).sort(sort).limit(limit + 1))
+    next_cursor = _encode_history_cursor(meal_plans[limit - 1]) if len(meal_plans) > limit else None
+    meal_plans = meal_plans[:limit]
+    
+    return jsonify({'success': True, 'meal_plans': meal_plans, 'next_cursor': next_cursor}), 200
 
 @preferences_bp.route('/meals/available', methods=['GET'])
 @jwt_required()
 def get_available_meals():
     user_id = get_jwt_identity()
     
-    user_preferences = mongo.db.user_preferences.find_one({'user_id': user_id})
+    user_preferences = preferences_repository.get(user_id)
     if not user_preferences:
         return jsonify({'success': False, 'error': 'Please set your preferences first'}), 400
     
@@ -163,10 +400,45 @@ def create_meal_plan():
         'created_at': datetime.utcnow()
     }
     
-    result = mongo.db.meal_plans.insert_one(meal_plan)
-    meal_plan['_id'] = str(result.inserted_id)
+    mongo.db.meal_plans.insert_one(meal_plan)
     
-    return jsonify({'success': True, 'meal_plan': meal_plan}), 201
+    return jsonify({'success': True, 'meal_plan': _serialize_meal_plan(meal_plan)}), 201
+
+def _serialize_meal_plan(plan):
+    # Manual meal plans are keyed by calendar day, so their date has no time part
+    plan['date'] = plan['date'].strftime('%Y-%m-%d')
+    return plan
+
+MAX_MEAL_PLAN_RANGE_DAYS = 92
+MAX_MEAL_PLAN_RANGE_RESULTS = 1000
+
+@meal_plans_bp.route('/meal-plans', methods=['GET'])
+@jwt_required()
+def get_meal_plans_in_range():
+    user_id = get_jwt_identity()
+    
+    try:
+        from_date = datetime.strptime(request.args['from'], '%Y-%m-%d')
+        to_date = datetime.strptime(request.args['to'], '%Y-%m-%d')
+    except (KeyError, ValueError):
+        return jsonify({'success': False, 'error': 'from and to must be dates in YYYY-MM-DD format'}), 400
+    if to_date < from_date:
+        return jsonify({'success': False, 'error': 'to must not be before from'}), 400
+    if (to_date - from_date).days >= MAX_MEAL_PLAN_RANGE_DAYS:
+        return jsonify({'success': False, 'error': f'Range must not exceed {MAX_MEAL_PLAN_RANGE_DAYS} days'}), 400
+    
+    cursor = mongo.db.meal_plans.find({
+        'user_id': user_id,
+        'date': {'$gte': from_date, '$lte': to_date}
+    }).sort('date', 1).limit(MAX_MEAL_PLAN_RANGE_RESULTS + 1)
+    if wants_ndjson():
+        return ndjson_response(cursor.limit(MAX_MEAL_PLAN_RANGE_RESULTS), _serialize_meal_plan)
+    
+    meal_plans = list(cursor)
+    truncated = len(meal_plans) > MAX_MEAL_PLAN_RANGE_RESULTS
+    meal_plans = [_serialize_meal_plan(plan) for plan in meal_plans[:MAX_MEAL_PLAN_RANGE_RESULTS]]
+    
+    return jsonify({'success': True, 'meal_plans': meal_plans, 'truncated': truncated}), 200
 
 @meal_plans_bp.route('/meal-plans/<date>', methods=['GET'])
 @jwt_required()
@@ -174,18 +446,125 @@ def get_meal_plans_by_date(date):
     user_id = get_jwt_identity()
     date_obj = datetime.strptime(date, '%Y-%m-%d')
     
-    meal_plans = list(mongo.db.meal_plans.find({
+    cursor = mongo.db.meal_plans.find({
         'user_id': user_id,
         'date': date_obj
-    }))
+    })
+    if wants_ndjson():
+        return ndjson_response(cursor, _serialize_meal_plan)
     
-    for plan in meal_plans:
-        plan['_id'] = str(plan['_id'])
-        plan['date'] = plan['date'].strftime('%Y-%m-%d')
-        plan['created_at'] = plan['created_at'].isoformat()
+    meal_plans = [_serialize_meal_plan(plan) for plan in cursor]
     
     return jsonify({'success': True, 'meal_plans': meal_plans}), 200
 
+MAX_BULK_MEAL_PLAN_OPERATIONS = 200
+BULK_MEAL_PLAN_OPS = ('create', 'update', 'delete')
+
+def _parse_bulk_meal_plan_operation(operation, user_id, now):
+    """Turn one bulk item into (meal plan id, pymongo write); raise ValueError when the item is malformed"""
+    if not isinstance(operation, dict) or operation.get('op') not in BULK_MEAL_PLAN_OPS:
+        raise ValueError(f"op must be one of {', '.join(BULK_MEAL_PLAN_OPS)}")
+    
+    if operation['op'] == 'create':
+        missing = [field for field in ('meal_type', 'meal_name', 'quantity', 'date') if field not in operation]
+        if missing:
+            raise ValueError(f"Missing fields: {', '.join(missing)}")
+        try:
+            date_obj = datetime.strptime(operation['date'], '%Y-%m-%d')
+        except (TypeError, ValueError):
+            raise ValueError('date must be in YYYY-MM-DD format')
+        # Assigning the _id up front lets the response report it per item
+        meal_plan_id = ObjectId()
+        return meal_plan_id, InsertOne({
+            '_id': meal_plan_id,
+            'user_id': user_id,
+            'meal_type': operation['meal_type'],
+            'meal_name': operation['meal_name'],
+            'quantity': operation['quantity'],
+            'date': date_obj,
+            'created_at': now
+        })
+    
+    if not ObjectId.is_valid(operation.get('id')):
+        raise ValueError('id must be a valid meal plan id')
+    meal_plan_id = ObjectId(operation['id'])
+    meal_plan_filter = {'_id': meal_plan_id, 'user_id': user_id}
+    if operation['op'] == 'update':
+        missing = [field for field in ('meal_name', 'quantity') if field not in operation]
+        if missing:
+            raise ValueError(f"Missing fields: {', '.join(missing)}")
+        return meal_plan_id, UpdateOne(meal_plan_filter, {'$set': {
+            'meal_name': operation['meal_name'],
+            'quantity': operation['quantity']
+        }})
+    return meal_plan_id, DeleteOne(meal_plan_filter)
+
+@meal_plans_bp.route('/meal-plans/bulk', methods=['POST'])
+@jwt_required()
+def bulk_write_meal_plans():
+    """Apply many creates, updates and deletes in a single bulk_write"""
+    user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    
+    operations = data.get('operations')
+    ordered = data.get('ordered', True)
+    if not isinstance(operations, list) or not 1 <= len(operations) <= MAX_BULK_MEAL_PLAN_OPERATIONS:
+        return jsonify({
+            'success': False,
+            'error': f'operations must be a list of 1 to {MAX_BULK_MEAL_PLAN_OPERATIONS} items'
+        }), 400
+    if not isinstance(ordered, bool):
+        return jsonify({'success': False, 'error': 'ordered must be a boolean'}), 400
+    
+    # Validate everything before writing anything, so a malformed batch has no partial effect
+    now = datetime.utcnow()
+    parsed, errors = [], []
+    for index, operation in enumerate(operations):
+        try:
+            parsed.append(_parse_bulk_meal_plan_operation(operation, user_id, now))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+    if errors:
+        return jsonify({'success': False, 'error': 'Invalid operations', 'errors': errors}), 400
+    
+    results = [
+        {'op': operation['op'], 'id': str(meal_plan_id), 'status': 'ok'}
+        for operation, (meal_plan_id, _) in zip(operations, parsed)
+    ]
+    
+    # Updates and deletes of plans the user does not own (or that are gone) would match
+    # nothing, and bulk_write only reports totals, so find them up front in one query
+    targeted = [meal_plan_id for operation, (meal_plan_id, _) in zip(operations, parsed) if operation['op'] != 'create']
+    if targeted:
+        owned = {plan['_id'] for plan in mongo.db.meal_plans.find(
+            {'_id': {'$in': targeted}, 'user_id': user_id}, {'_id': 1})}
+        for result, (meal_plan_id, _) in zip(results, parsed):
+            if result['op'] != 'create' and meal_plan_id not in owned:
+                result['status'] = 'not_found'
+    submitted = [index for index, result in enumerate(results) if result['status'] == 'ok']
+    
+    summary = {'inserted': 0, 'updated': 0, 'deleted': 0}
+    if submitted:
+        try:
+            outcome = mongo.db.meal_plans.bulk_write([parsed[index][1] for index in submitted], ordered=ordered)
+            outcome = outcome.bulk_api_result
+        except BulkWriteError as e:
+            outcome = e.details
+            for error in outcome['writeErrors']:
+                results[submitted[error['index']]].update(status='error', error=error['errmsg'])
+            if ordered and outcome['writeErrors']:
+                # An ordered bulk write stops at its first failure
+                for index in submitted[outcome['writeErrors'][0]['index'] + 1:]:
+                    results[index]['status'] = 'skipped'
+        summary = {
+            'inserted': outcome['nInserted'],
+            'updated': outcome['nModified'],
+            'deleted': outcome['nRemoved']
+        }
+    
+    success = all(result['status'] == 'ok' for result in results)
+    return jsonify({'success': success, 'results': results, **summary}), 200
+
 @meal_plans_bp.route('/meal-plans/<meal_plan_id>', methods=['PUT'])
 @jwt_required()
 def update_meal_plan(meal_plan_id):
@@ -216,39 +595,62 @@ def delete_meal_plan(meal_plan_id):
     
     return jsonify({'success': True, 'message': 'Meal plan deleted'}), 200
 
+MAX_AWARDS_PAGE_SIZE = 100
+
+def _award_page_args():
+    """Read optional `offset`/`limit` query params; raise ValueError when they are malformed"""
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', None, type=int)
+    # `type=int` falls back to the default on garbage, so check the raw values were parsed
+    if (offset < 0 or (offset == 0 and request.args.get('offset', '0') != '0')
+            or (limit is None and 'limit' in request.args)):
+        raise ValueError('offset must be a non-negative integer and limit a positive integer')
+    if limit is not None and not 1 <= limit <= MAX_AWARDS_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_AWARDS_PAGE_SIZE}')
+    return offset, limit
+
 @badges_bp.route('/badges', methods=['GET'])
 @jwt_required()
 def get_user_badges():
     user_id = get_jwt_identity()
     
-    user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
-    badges = user.get('badges', [])
+    try:
+        offset, limit = _award_page_args()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    page = user_repository.get_badges(user_id, offset, limit)
+    if page is None:
+        return jsonify({'success': False, 'error': 'User not found'}), 404
+    badges, total = page
     
-    return jsonify({'success': True, 'badges': badges}), 200
+    return jsonify({'success': True, 'badges': badges, 'total': total}), 200
 
 @badges_bp.route('/milestones', methods=['GET'])
 @jwt_required()
 def get_user_milestones():
     user_id = get_jwt_identity()
     
-    user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
-    milestones = user.get('milestones', [])
+    try:
+        offset, limit = _award_page_args()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
-    return jsonify({'success': True, 'milestones': milestones}), 200
+    page = user_repository.get_milestones(user_id, offset, limit)
+    if page is None:
+        return jsonify({'success': False, 'error': 'User not found'}), 404
+    milestones, total = page
+    
+    return jsonify({'success': True, 'milestones': milestones, 'total': total}), 200
 
 @badges_bp.route('/progress', methods=['GET'])
 @jwt_required()
 def get_user_progress():
     user_id = get_jwt_identity()
     
-    user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
-    
-    progress = {
-        'level': user.get('level', 1),
-        'experience': user.get('experience', 0),
-        'badges_count': len(user.get('badges', [])),
-        'milestones_count': len(user.get('milestones', []))
-    }
+    progress = user_repository.get_progress(user_id)
+    if progress is None:
+        return jsonify({'success': False, 'error': 'User not found'}), 404
     
     return jsonify({'success': True, 'progress': progress}), 200
 
@@ -256,7 +658,7 @@ def get_user_progress():
 @jwt_required()
 def get_available_challenges():
     user_id = get_jwt_identity()
-    user_challenges = list(mongo.db.user_challenges.find({'user_id': user_id}))
+    user_challenges = list(readonly_collection('user_challenges').find({'user_id': user_id}))
     joined_ids = {str(uc['challenge_id']) for uc in user_challenges}
     completed_ids = {str(uc['challenge_id']) for uc in user_challenges if uc.get('completed')}
 
@@ -284,44 +686,47 @@ def join_challenge(challenge_id):
     start_date = datetime.utcnow()
     end_date = start_date + timedelta(days=challenge['duration'])
     
-    progress = {}
-    for i in range(challenge['duration']):
-        day = (start_date + timedelta(days=i)).strftime('%Y-%m-%d')
-        progress[day] = False
-    
     user_challenge = {
         'user_id': user_id,
         'challenge_id': challenge_id,
         'start_date': start_date,
         'end_date': end_date,
-        'progress': progress,
+        **new_progress(start_date, challenge['duration']),
         'completed': False,
         'created_at': datetime.utcnow()
     }
     
-    result = mongo.db.user_challenges.insert_one(user_challenge)
-    user_challenge['_id'] = str(result.inserted_id)
+    mongo.db.user_challenges.insert_one(user_challenge)
     
-    return jsonify({'success': True, 'user_challenge': user_challenge}), 201
+    return jsonify({'success': True, 'user_challenge': _with_progress_dict(user_challenge)}), 201
+
+def _with_progress_dict(user_challenge):
+    """Replace the bitset fields with the per-day progress dict the API has always returned"""
+    user_challenge['progress'] = decode_progress(user_challenge)
+    for field in ('start_day', 'progress_bits', 'completed_mask'):
+        user_challenge.pop(field, None)
+    return user_challenge
+
+def _serialize_user_challenge(user_challenge):
+    _with_progress_dict(user_challenge)
+    
+    challenge = STATIC_CHALLENGE_MAP.get(str(user_challenge['challenge_id']))
+    if challenge:
+        user_challenge['challenge_name'] = challenge['name']
+        user_challenge['challenge_description'] = challenge['details']
+        user_challenge['type'] = challenge['type']
+    return user_challenge
 
 @challenges_bp.route('/user-challenges', methods=['GET'])
 @jwt_required()
 def get_user_challenges():
     user_id = get_jwt_identity()
     
-    user_challenges = list(mongo.db.user_challenges.find({'user_id': user_id}))
+    cursor = readonly_collection('user_challenges').find({'user_id': user_id})
+    if wants_ndjson():
+        return ndjson_response(cursor, _serialize_user_challenge)
     
-    for user_challenge in user_challenges:
-        user_challenge['_id'] = str(user_challenge['_id'])
-        user_challenge['start_date'] = user_challenge['start_date'].isoformat()
-        user_challenge['end_date'] = user_challenge['end_date'].isoformat()
-        user_challenge['created_at'] = user_challenge['created_at'].isoformat()
-        
-        challenge = STATIC_CHALLENGE_MAP.get(str(user_challenge['challenge_id']))
-        if challenge:
-            user_challenge['challenge_name'] = challenge['name']
-            user_challenge['challenge_description'] = challenge['details']
-            user_challenge['type'] = challenge['type']
+    user_challenges = [_serialize_user_challenge(user_challenge) for user_challenge in cursor]
     
     return jsonify({'success': True, 'user_challenges': user_challenges}), 200
 
@@ -332,74 +737,46 @@ def complete_challenge_day(user_challenge_id):
     data = request.get_json()
     day = data['day']
     
-    result = mongo.db.user_challenges.update_one(
-        {
-            '_id': ObjectId(user_challenge_id),
-            'user_id': user_id
-        },
-        {
-            '$set': {f'progress.{day}': True}
-        }
-    )
+    try:
+        day_obj = datetime.strptime(day, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'day must be a YYYY-MM-DD date'}), 400
     
-    user_challenge = mongo.db.user_challenges.find_one({
-        '_id': ObjectId(user_challenge_id)
-    })
+    # Set the day's bit and settle completion in one atomic update. Every request sees a
+    # distinct pre-image, so exactly one of several concurrent requests completes it.
+    challenge_filter = {
+        '_id': ObjectId(user_challenge_id),
+        'user_id': user_id
+    }
+    update = {
+        'filter': dict(challenge_filter, progress_bits={'$exists': True}),
+        'update': complete_day_pipeline(day_obj),
+        'projection': {'start_day': 1, 'progress_bits': 1, 'completed_mask': 1, 'completed': 1, 'challenge_id': 1},
+        'return_document': ReturnDocument.BEFORE
+    }
+    user_challenge = mongo.db.user_challenges.find_one_and_update(**update)
+    # Documents written before the bitset encoding are converted the first time they are touched
+    if not user_challenge and migrate_legacy_challenge(challenge_filter['_id']):
+        user_challenge = mongo.db.user_challenges.find_one_and_update(**update)
     
-    if user_challenge:
-        progress = user_challenge['progress']
-        all_completed = all(progress.values())
-        
-        if all_completed:
-            mongo.db.user_challenges.update_one(
-                {'_id': ObjectId(user_challenge_id)},
-                {
-                    '$set': {
-                        'completed': True,
-                        'completed_at': datetime.utcnow()
-                    }
-                }
-            )
-            
-            ch = STATIC_CHALLENGE_MAP.get(str(user_challenge.get('challenge_id')))
-            awarded_xp = ch.get('xp', 100) if ch else 100
-            mongo.db.users.update_one(
-                {'_id': ObjectId(user_id)},
-                {
-                    '$inc': {'experience': awarded_xp},
-                    '$push': {
-                        'badges': {
-                            'name': 'Challenge Master',
-                            'details': 'Completed a fitness challenge',
-                            'icon': '🏆',
-                            'category': 'challenge',
-                            'awarded_at': datetime.utcnow()
-                        }
-                    }
-                }
-            )
-            
-            user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
-            if user:
-                current_level = user.get('level', 1)
-                current_exp = user.get('experience', 0)
-                required_exp = current_level * 100
-                if current_exp >= required_exp:
-                    new_level = current_level + 1
-                    mongo.db.users.update_one(
-                        {'_id': ObjectId(user_id)},
-                        {
-                            '$set': {'level': new_level},
-                            '$push': {
-                                'milestones': {
-                                    'name': f'Level {new_level}',
-                                    'details': f'Reached level {new_level}',
-                                    'icon': '⭐',
-                                    'category': 'level',
-                                    'awarded_at': datetime.utcnow()
-                                }
-                            }
-                        }
-                    )
-    
-    return jsonify({'success': True, 'message': 'Day completed'}), 200
\ No newline at end of file
+    if not user_challenge:
+        return jsonify({'success': False, 'error': 'Challenge not found'}), 404
+    
+    bit = day_bit(user_challenge, day_obj)
+    if not bit:
+        return jsonify({'success': False, 'error': 'day is not part of this challenge'}), 400
+    
+    if not user_challenge.get('completed') and user_challenge['progress_bits'] | bit == user_challenge['completed_mask']:
+        ch = STATIC_CHALLENGE_MAP.get(str(user_challenge.get('challenge_id')))
+        awarded_xp = ch.get('xp', 100) if ch else 100
+        _award_challenge_completion(user_id, awarded_xp)
+        user_repository.invalidate(user_id)
+    
+    return jsonify({'success': True, 'message': 'Day completed'}), 200
+
+def _award_challenge_completion(user_id, awarded_xp):
+    """Add XP and the badge, then level up if the new XP reaches level * 100, in one update"""
+    mongo.db.users.update_one(
+        {'_id': ObjectId(user_id)},
+        award_completion_pipeline(awarded_xp, datetime.utcnow())
+    )
@@ -1,11 +1,170 @@
 import random
 import copy
-from typing import List, Dict, Any
+import hashlib
+import itertools
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from datetime import datetime, date
 
+import numpy as np
+
+from .cache import TTLCache
+
+GA_ENGINES = ("python", "numpy")
+
+AGE_GROUPS = ("young", "adult", "older")
+DIETARY_PREFERENCES = ("vegetarian", "non_vegetarian", "no_sugar")
+FITNESS_GOALS = ("weight_loss", "weight_gain", "stay_fit")
+FALLBACK_POOL_SIZE = 9
+
+def derive_seed(user_id: str, day: date) -> int:
+    """Stable 64-bit RNG seed for a user's plan on a given day"""
+    digest = hashlib.sha256(f"{user_id}:{day.isoformat()}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+class GenerationBudget:
+    """Decides when a GA run should stop: generation cap, convergence or wall-clock deadline"""
+    
+    def __init__(self, max_generations: int, patience: Optional[int] = None, time_budget_ms: Optional[float] = None):
+        self.max_generations = max_generations
+        self.patience = patience
+        self.deadline = time.perf_counter() + time_budget_ms / 1000 if time_budget_ms else None
+        self.best_fitness = float("-inf")
+        self.stale_generations = 0
+        self.generations = 0
+        self.stop_reason = "max_generations"
+    
+    def record(self, generation_best: float) -> bool:
+        """Record the best fitness of the current generation; return True if it improved on the best so far"""
+        if generation_best > self.best_fitness:
+            self.best_fitness = generation_best
+            self.stale_generations = 0
+            return True
+        self.stale_generations += 1
+        return False
+    
+    def should_stop(self) -> bool:
+        """Check the stopping conditions before evolving another generation"""
+        if self.generations >= self.max_generations:
+            self.stop_reason = "max_generations"
+            return True
+        if self.patience and self.stale_generations >= self.patience:
+            self.stop_reason = "converged"
+            return True
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.stop_reason = "deadline"
+            return True
+        self.generations += 1
+        return False
+    
+    def report(self, engine: str) -> Dict[str, Any]:
+        return {
+            "engine": engine,
+            "generations": self.generations,
+            "stop_reason": self.stop_reason,
+            "best_fitness": self.best_fitness,
+        }
+
+class WeeklyPlanState:
+    """A multi-day plan scored incrementally.
+    
+    The score is the sum of the daily fitness scores minus `repeat_penalty` for every pair of
+    slots at most `repeat_window` days apart (the same day included) that serve the same meal.
+    Changing one slot only re-scores its own day and the days inside its window.
+    """
+    
+    def __init__(self, slots: List[List[int]], day_fitness: Callable[[List[int]], float],
+                 repeat_window: int, repeat_penalty: float):
+        self.slots = slots
+        self.day_fitness = day_fitness
+        self.repeat_window = repeat_window
+        self.repeat_penalty = repeat_penalty
+        self.day_scores = [day_fitness(day) for day in slots]
+        self.meal_counts = [Counter(day) for day in slots]
+        self.repeats = sum(
+            self._occurrences_near(day, meal) - 1 for day, meals in enumerate(slots) for meal in meals
+        ) // 2
+        self.score = sum(self.day_scores) - repeat_penalty * self.repeats
+    
+    def _occurrences_near(self, day: int, meal: int) -> int:
+        """Occurrences of a meal on the days inside the repeat window around `day`"""
+        first = max(0, day - self.repeat_window)
+        last = min(len(self.slots) - 1, day + self.repeat_window)
+        return sum(self.meal_counts[other][meal] for other in range(first, last + 1))
+    
+    def delta(self, day: int, slot: int, meal: int) -> Tuple[float, float, int]:
+        """Score change, new day score and repeat change if `slots[day][slot]` became `meal`"""
+        current = self.slots[day][slot]
+        if meal == current:
+            return 0.0, self.day_scores[day], 0
+        proposed_day = list(self.slots[day])
+        proposed_day[slot] = meal
+        day_score = self.day_fitness(proposed_day)
+        # The slot stops pairing with the other copies of `current` and starts pairing with every `meal`
+        repeat_change = self._occurrences_near(day, meal) - (self._occurrences_near(day, current) - 1)
+        return day_score - self.day_scores[day] - self.repeat_penalty * repeat_change, day_score, repeat_change
+    
+    def apply(self, day: int, slot: int, meal: int, score_delta: float, day_score: float, repeat_change: int) -> None:
+        counts = self.meal_counts[day]
+        counts[self.slots[day][slot]] -= 1
+        counts[meal] += 1
+        self.slots[day][slot] = meal
+        self.day_scores[day] = day_score
+        self.repeats += repeat_change
+        self.score += score_delta
+
 class MealGenerationService:
-    def __init__(self):
+    POPULATION_SIZE = 50
+    GENERATIONS = 100
+    MUTATION_RATE = 0.1
+    TOURNAMENT_SIZE = 3
+    WEEK_ITERATIONS = 5000
+    WEEK_PATIENCE = 500
+    WEEK_REPEAT_PENALTY = 25.0
+
+    def __init__(self, ga_engine: str = "python", patience: Optional[int] = 10,
+                 time_budget_ms: Optional[float] = None, exhaustive_pool_limit: int = 20):
         self.meals_database = self._initialize_meals_database()
+        self.ga_engine = self._validate_engine(ga_engine)
+        self.patience = patience
+        self.time_budget_ms = time_budget_ms
+        self.exhaustive_pool_limit = exhaustive_pool_limit
+        self.repeat_window = 2
+        self.plan_cache = TTLCache(maxsize=1024, ttl=24 * 60 * 60)
+        self.batch_workers = os.cpu_count() or 1
+        self.batch_parallel_min = 16
+        self._batch_pool: Optional[ProcessPoolExecutor] = None
+        self._batch_pool_lock = threading.Lock()
+        self._build_meal_index()
+
+    def init_app(self, app) -> None:
+        """Apply meal generation settings from the Flask config"""
+        self.ga_engine = self._validate_engine(app.config.get("MEAL_GA_ENGINE", self.ga_engine))
+        self.patience = app.config.get("MEAL_GA_PATIENCE", self.patience)
+        self.time_budget_ms = app.config.get("MEAL_GA_TIME_BUDGET_MS", self.time_budget_ms)
+        self.exhaustive_pool_limit = app.config.get("MEAL_EXHAUSTIVE_POOL_LIMIT", self.exhaustive_pool_limit)
+        self.plan_cache.configure(
+            app.config.get("MEAL_PLAN_CACHE_SIZE", self.plan_cache.maxsize),
+            app.config.get("MEAL_PLAN_CACHE_TTL", self.plan_cache.ttl),
+        )
+        self.batch_workers = app.config.get("MEAL_BATCH_WORKERS") or self.batch_workers
+        self.batch_parallel_min = app.config.get("MEAL_BATCH_PARALLEL_MIN", self.batch_parallel_min)
+        self.repeat_window = app.config.get("MEAL_WEEK_REPEAT_WINDOW", self.repeat_window)
+        # Cached plans and batch workers were set up under the previous settings
+        self.plan_cache.clear()
+        self._shutdown_batch_pool()
+
+    @staticmethod
+    def _validate_engine(engine: str) -> str:
+        if engine not in GA_ENGINES:
+            raise ValueError(f"Unknown GA engine '{engine}', expected one of {GA_ENGINES}")
+        return engine
     
     def _initialize_meals_database(self) -> List[Dict[str, Any]]:
         return [
@@ -55,106 +214,328 @@ class MealGenerationService:
 ]    
 
      
-    def filter_meals_by_preferences(self, age_group: str, dietary_preference: str, fitness_goal: str) -> List[Dict]:    
+    def load_meals_database(self, meals: List[Dict[str, Any]]) -> None:
+        """Replace the meal catalog, rebuild the filtering index and drop cached plans"""
+        self.meals_database = meals
+        self._build_meal_index()
+        self.plan_cache.clear()
+        self._shutdown_batch_pool()
     
-        filtered_meals: List[Dict] = [] 
+    def _build_meal_index(self) -> None:
+        """Encode meal tags as bitmasks and precompute candidates for every preference combination"""
+        self._tag_bits: Dict[str, int] = {}
+        self._meal_masks: List[int] = []
         for meal in self.meals_database:
-            if self._meal_matches_preferences(meal, age_group, dietary_preference, fitness_goal):
-                filtered_meals.append(meal)
-        return filtered_meals
+            mask = 0
+            for tag in meal["tags"]:
+                mask |= self._tag_bits.setdefault(tag, 1 << len(self._tag_bits))
+            self._meal_masks.append(mask)
+        
+        self._filtered_index: Dict[Tuple[str, str, str], List[Dict]] = {}
+        self._candidate_index: Dict[Tuple[str, str, str], List[Dict]] = {}
+        fallback_index = {
+            (dietary_preference, fitness_goal): self._scan_fallback_meals(dietary_preference, fitness_goal)
+            for dietary_preference, fitness_goal in itertools.product(DIETARY_PREFERENCES, FITNESS_GOALS)
+        }
+        for key in itertools.product(AGE_GROUPS, DIETARY_PREFERENCES, FITNESS_GOALS):
+            age_group, dietary_preference, fitness_goal = key
+            filtered_meals = self._scan_meals(age_group, dietary_preference, fitness_goal)
+            self._filtered_index[key] = filtered_meals
+            if len(filtered_meals) < 3:
+                filtered_meals = fallback_index[(dietary_preference, fitness_goal)]
+            self._candidate_index[key] = filtered_meals
     
-    def _meal_matches_preferences(self, meal: Dict, age_group: str, dietary_preference: str, fitness_goal: str) -> bool:
+    def _tags_mask(self, tags: List[str]) -> Optional[int]:
+        """Bitmask for a set of tags, or None if any tag is unknown to the catalog"""
+        mask = 0
+        for tag in tags:
+            if tag not in self._tag_bits:
+                return None
+            mask |= self._tag_bits[tag]
+        return mask
+    
+    def _diet_exclusion_mask(self, dietary_preference: str) -> int:
+        """Bitmask of tags that rule a meal out for a dietary preference"""
+        if dietary_preference == "vegetarian":
+            return self._tag_bits.get("non_vegetarian", 0)
+        elif dietary_preference == "non_vegetarian":
+            return self._tag_bits.get("vegetarian", 0)
+        return 0
+    
+    def filter_meals_by_preferences(self, age_group: str, dietary_preference: str, fitness_goal: str) -> List[Dict]:    
     
-        tags = meal["tags"]
+        key = (age_group, dietary_preference, fitness_goal)
+        if key in self._filtered_index:
+            return list(self._filtered_index[key])
+        return self._scan_meals(age_group, dietary_preference, fitness_goal)
+    
+    def _scan_meals(self, age_group: str, dietary_preference: str, fitness_goal: str) -> List[Dict]:
+        """Filter the catalog by comparing tag bitmasks"""
+        required_tags = [age_group, fitness_goal]
+        if dietary_preference == "no_sugar":
+            required_tags.append("no_sugar")
+        required = self._tags_mask(required_tags)
+        if required is None:
+            return []
+        excluded = self._diet_exclusion_mask(dietary_preference)
         
+        return [
+            meal for meal, mask in zip(self.meals_database, self._meal_masks)
+            if mask & required == required and not mask & excluded
+        ]
     
-        if age_group not in tags:
-            return False
+    def _candidate_pool(self, age_group: str, dietary_preference: str, fitness_goal: str) -> List[Dict]:
+        """Meals the optimizer picks from, falling back to a looser pool when filtering is too strict"""
+        key = (age_group, dietary_preference, fitness_goal)
+        if key in self._candidate_index:
+            return self._candidate_index[key]
         
-        if dietary_preference == "vegetarian" and "non_vegetarian" in tags:
-            return False
-        elif dietary_preference == "non_vegetarian" and "vegetarian" in tags:
-            return False
+        filtered_meals = self._scan_meals(age_group, dietary_preference, fitness_goal)
+        if len(filtered_meals) < 3:
+            filtered_meals = self._get_fallback_meals(age_group, dietary_preference, fitness_goal)
+        return filtered_meals
+    
+    def generate_meal_plan(self, age_group: str, dietary_preference: str, fitness_goal: str,
+                           engine: Optional[str] = None, time_budget_ms: Optional[float] = None,
+                           seed: Optional[int] = None) -> Dict[str, Any]:
+        """Generate a meal plan, enumerating small candidate pools and running the genetic algorithm otherwise.
         
-        if fitness_goal not in tags:
-            return False
+        Seeded plans are reproducible and served from the plan cache on repeat requests,
+        unless the time budget cut the run short.
+        """
+        engine = self._validate_engine(engine or self.ga_engine)
+        if seed is None:
+            return self._optimize(age_group, dietary_preference, fitness_goal, engine, time_budget_ms, None)
         
-        if dietary_preference == "no_sugar" and "no_sugar" not in tags:
-            return False
+        cache_key = (age_group, dietary_preference, fitness_goal, engine, seed)
+        meal_plan = self.plan_cache.get(cache_key)
+        if meal_plan is not None:
+            return self._copy_cached_plan(meal_plan, "hit")
         
-        return True 
+        meal_plan = self._optimize(age_group, dietary_preference, fitness_goal, engine, time_budget_ms, seed)
+        self._cache_plan(cache_key, meal_plan)
+        return self._copy_cached_plan(meal_plan, "miss")
     
-    def generate_meal_plan(self, age_group: str, dietary_preference: str, fitness_goal: str) -> Dict[str, Any]:
-        """Generate a meal plan using genetic algorithm"""
-        filtered_meals = self.filter_meals_by_preferences(age_group, dietary_preference, fitness_goal)
+    def generate_meal_plans(self, requests: List[Tuple[str, str, str, int]],
+                            engine: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Generate seeded meal plans for many (age_group, dietary_preference, fitness_goal, seed) requests.
         
-        if len(filtered_meals) < 3:
-            filtered_meals = self._get_fallback_meals(age_group, dietary_preference, fitness_goal)
+        Requests are grouped by preference tuple, cached plans are reused and the remaining
+        optimizations run in parallel on the batch worker processes. Plans come back in request order.
+        """
+        engine = self._validate_engine(engine or self.ga_engine)
+        meal_plans: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        
+        pending: Dict[Tuple[str, str, str], List[Tuple[int, int]]] = {}
+        for position, (age_group, dietary_preference, fitness_goal, seed) in enumerate(requests):
+            preferences = (age_group, dietary_preference, fitness_goal)
+            cached_plan = self.plan_cache.get(preferences + (engine, seed))
+            if cached_plan is not None:
+                meal_plans[position] = self._copy_cached_plan(cached_plan, "hit")
+            else:
+                pending.setdefault(preferences, []).append((position, seed))
+        
+        for preferences, positions, results in self._optimize_groups(pending, engine):
+            for (position, seed), meal_plan in zip(positions, results):
+                self._cache_plan(preferences + (engine, seed), meal_plan)
+                meal_plans[position] = self._copy_cached_plan(meal_plan, "miss")
+        
+        return meal_plans
+    
+    def _optimize_groups(self, pending: Dict[Tuple[str, str, str], List[Tuple[int, int]]], engine: str):
+        """Yield (preferences, [(position, seed)], plans) for every chunk of pending requests.
+        
+        Only genetic-algorithm runs go to the worker processes, and only when there are at
+        least `batch_parallel_min` of them: an exhaustive pool solves a plan in about a
+        millisecond, far less than the IPC (and the first call's process spawn) would cost.
+        """
+        parallel = {
+            preferences: positions for preferences, positions in pending.items()
+            if len(self._candidate_pool(*preferences)) > self.exhaustive_pool_limit
+        }
+        total = sum(len(positions) for positions in parallel.values())
+        if self.batch_workers <= 1 or total < max(self.batch_parallel_min, 2):
+            parallel = {}
+        
+        for preferences, positions in pending.items():
+            if preferences not in parallel:
+                yield preferences, positions, [
+                    self._optimize(*preferences, engine, None, seed) for _, seed in positions
+                ]
+        if not parallel:
+            return
+        
+        # A few chunks per worker keeps the pool busy without paying per-plan IPC
+        chunk_size = max(1, math.ceil(total / (self.batch_workers * 4)))
+        pool = self._get_batch_pool()
+        futures = []
+        for preferences, positions in parallel.items():
+            for start in range(0, len(positions), chunk_size):
+                chunk = positions[start:start + chunk_size]
+                seeds = [seed for _, seed in chunk]
+                futures.append((preferences, chunk, pool.submit(_optimize_batch, *preferences, engine, seeds)))
+        for preferences, chunk, future in futures:
+            yield preferences, chunk, future.result()
+    
+    def _get_batch_pool(self) -> ProcessPoolExecutor:
+        with self._batch_pool_lock:
+            if self._batch_pool is None:
+                # Spawned (not forked) workers so no lock held by a web or Mongo thread is inherited
+                self._batch_pool = ProcessPoolExecutor(
+                    max_workers=self.batch_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_batch_worker,
+                    initargs=(self.meals_database, self._worker_settings()),
+                )
+            return self._batch_pool
+    
+    def _shutdown_batch_pool(self) -> None:
+        with self._batch_pool_lock:
+            if self._batch_pool is not None:
+                self._batch_pool.shutdown(wait=False, cancel_futures=True)
+                self._batch_pool = None
+    
+    def _worker_settings(self) -> Dict[str, Any]:
+        return {
+            "ga_engine": self.ga_engine,
+            "patience": self.patience,
+            "time_budget_ms": self.time_budget_ms,
+            "exhaustive_pool_limit": self.exhaustive_pool_limit,
+        }
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.plan_cache.stats()
+    
+    def _cache_plan(self, cache_key: Tuple, meal_plan: Dict[str, Any]) -> None:
+        # A run cut short by its time budget is not the plan a larger budget would find
+        if meal_plan["optimizer"]["stop_reason"] != "deadline":
+            self.plan_cache.set(cache_key, meal_plan)
+    
+    def _copy_cached_plan(self, meal_plan: Dict[str, Any], cache_status: str) -> Dict[str, Any]:
+        """Copy a cached plan so callers cannot mutate the cache entry"""
+        meal_plan = copy.deepcopy(meal_plan)
+        meal_plan["generated_at"] = datetime.utcnow().isoformat()
+        meal_plan["optimizer"]["cache"] = cache_status
+        return meal_plan
+    
+    def _optimize(self, age_group: str, dietary_preference: str, fitness_goal: str, engine: str,
+                  time_budget_ms: Optional[float], seed: Optional[int]) -> Dict[str, Any]:
+        filtered_meals = self._candidate_pool(age_group, dietary_preference, fitness_goal)
         
         # best meal plan
-        best_plan = self._genetic_algorithm_optimization(filtered_meals, fitness_goal)  
+        if len(filtered_meals) <= self.exhaustive_pool_limit:
+            rng = np.random.default_rng(seed) if seed is not None else None
+            return self._exhaustive_optimization(filtered_meals, fitness_goal, rng)
+        
+        budget = GenerationBudget(
+            self.GENERATIONS,
+            patience=self.patience,
+            time_budget_ms=time_budget_ms if time_budget_ms is not None else self.time_budget_ms,
+        )
+        if engine == "numpy":
+            best_plan = self._vectorized_genetic_algorithm_optimization(
+                filtered_meals, fitness_goal, budget, np.random.default_rng(seed))
+        else:
+            best_plan = self._genetic_algorithm_optimization(filtered_meals, fitness_goal, budget, random.Random(seed))
         
         return best_plan 
     
+    def _exhaustive_optimization(self, filtered_meals: List[Dict], fitness_goal: str,
+                                 rng: Optional[np.random.Generator] = None) -> Dict[str, Any]:
+        """Score every (breakfast, lunch, dinner) triple and return an optimal one.
+        
+        Without an RNG the first optimum is returned; with one, ties are broken reproducibly by the RNG.
+        """
+        total = max(len(filtered_meals), 1)
+        candidates = np.indices((total, total, total)).reshape(3, -1).T
+        fitness_scores = self._calculate_fitness_batch(candidates, fitness_goal)
+        optimal = np.flatnonzero(fitness_scores == fitness_scores.max())
+        best = int(optimal[0] if rng is None else optimal[rng.integers(len(optimal))])
+        
+        meal_plan = self._format_meal_plan(candidates[best].tolist(), filtered_meals)
+        meal_plan["optimizer"] = {
+            "engine": "exhaustive",
+            "generations": 0,
+            "stop_reason": "exhaustive",
+            "best_fitness": float(fitness_scores[best]),
+            "candidates_evaluated": len(candidates),
+        }
+        return meal_plan
+    
     def _get_fallback_meals(self, age_group: str, dietary_preference: str, fitness_goal: str) -> List[Dict]:
         """Get fallback meals when strict filtering doesn't provide enough options"""
+        return self._scan_fallback_meals(dietary_preference, fitness_goal)
+    
+    def _scan_fallback_meals(self, dietary_preference: str, fitness_goal: str) -> List[Dict]:
+        """First meals matching the fitness goal without conflicting with the diet"""
+        required = self._tags_mask([fitness_goal])
+        if required is None:
+            return []
+        excluded = self._diet_exclusion_mask(dietary_preference)
+        
         backup_meal: List[Dict] = []
-        for meal in self.meals_database:
-            tags = meal["tags"]
-            if dietary_preference == "vegetarian" and "non_vegetarian" in tags:
-                continue
-            elif dietary_preference == "non_vegetarian" and "vegetarian" in tags:
-                continue
-            if fitness_goal not in tags:
-                continue
-            backup_meal.append(meal)
-            if len(backup_meal) >= 9:  
-                break
+        for meal, mask in zip(self.meals_database, self._meal_masks):
+            if mask & required and not mask & excluded:
+                backup_meal.append(meal)
+                if len(backup_meal) >= FALLBACK_POOL_SIZE:
+                    break
         return backup_meal
     
-    def _genetic_algorithm_optimization(self, filtered_meals: List[Dict], fitness_goal: str) -> Dict[str, Any]:
+    def _genetic_algorithm_optimization(self, filtered_meals: List[Dict], fitness_goal: str,
+                                        budget: Optional[GenerationBudget] = None,
+                                        rng: Optional[random.Random] = None) -> Dict[str, Any]:
         """Optimize meal selection using genetic algorithm"""
-        population_size = 50
-        generations = 100
-        mutation_rate = 0.1
+        population_size = self.POPULATION_SIZE
+        mutation_rate = self.MUTATION_RATE
+        budget = budget or GenerationBudget(self.GENERATIONS)
+        rng = rng or random.Random()
         
         # population Initialization 
-        population = self._initialize_population(filtered_meals, population_size) 
+        population = self._initialize_population(filtered_meals, population_size, rng) 
+        best_individual = population[0]
         
         # Evolution loop
-        for generation in range(generations):
+        while True:
             # Evaluate fitness
             fitness_scores = [self._calculate_fitness(individual, fitness_goal) for individual in population]
             
+            # Keep the best individual seen so far
+            generation_best = max(range(population_size), key=fitness_scores.__getitem__)
+            if budget.record(fitness_scores[generation_best]):
+                best_individual = list(population[generation_best])
+            
+            if budget.should_stop():
+                break
+            
             # Selection
             new_population = []
             for _ in range(population_size):
-                parent1 = self._tournament_selection(population, fitness_scores)
-                parent2 = self._tournament_selection(population, fitness_scores)
+                parent1 = self._tournament_selection(population, fitness_scores, rng)
+                parent2 = self._tournament_selection(population, fitness_scores, rng)
                 
                 # Crossover
-                child = self._crossover(parent1, parent2)
+                child = self._crossover(parent1, parent2, rng)
                 
                 # Mutation
-                if random.random() < mutation_rate:
-                    child = self._mutate(child, filtered_meals)
+                if rng.random() < mutation_rate:
+                    child = self._mutate(child, filtered_meals, rng)
                 
                 new_population.append(child)
             
             population = new_population
         
-        # Get best individual
-        best_individual = max(population, key=lambda x: self._calculate_fitness(x, fitness_goal))
-        
-        return self._format_meal_plan(best_individual, filtered_meals)
+        meal_plan = self._format_meal_plan(best_individual, filtered_meals)
+        meal_plan["optimizer"] = budget.report("python")
+        return meal_plan
     
-    def _initialize_population(self, filtered_meals: List[Dict], population_size: int) -> List[List[int]]:
+    def _initialize_population(self, filtered_meals: List[Dict], population_size: int,
+                               rng: random.Random) -> List[List[int]]:
         """Initialize population with random meal selections (3 indices)"""
         population: List[List[int]] = []
         total = max(len(filtered_meals), 1)
         for _ in range(population_size):
             if total >= 3:
-                individual = random.sample(range(total), 3)
+                individual = rng.sample(range(total), 3)
             else:
                 individual = [0, 0, 0]
             population.append(individual)
@@ -169,38 +550,179 @@ class MealGenerationService:
             fitness_score += 20
         
         # Bonus for fitness goal alignment
+        fitness_score += self._goal_bonus(fitness_goal)
+        
+        return fitness_score 
+    
+    def _goal_bonus(self, fitness_goal: str) -> float:
+        """Fitness bonus for goal alignment"""
         if fitness_goal == "weight_loss":
-            fitness_score += 15
+            return 15
         elif fitness_goal == "weight_gain":
-            fitness_score += 15
+            return 15
         else:  # stay_fit
-            fitness_score += 10
-        
-        return fitness_score 
+            return 10
     
-    def _tournament_selection(self, population: List[List[int]], fitness_scores: List[float]) -> List[int]:
+    def _tournament_selection(self, population: List[List[int]], fitness_scores: List[float],
+                              rng: random.Random) -> List[int]:
         """Tournament selection for parent selection"""
-        tournament_size = 3
-        tournament_indices = random.sample(range(len(population)), tournament_size)
+        tournament_size = self.TOURNAMENT_SIZE
+        tournament_indices = rng.sample(range(len(population)), tournament_size)
         tournament_fitness = [fitness_scores[i] for i in tournament_indices]
         
         winner_index = tournament_indices[tournament_fitness.index(max(tournament_fitness))]
         return population[winner_index]
     
-    def _crossover(self, parent1: List[int], parent2: List[int]) -> List[int]:
+    def _crossover(self, parent1: List[int], parent2: List[int], rng: random.Random) -> List[int]:
         """Single-point crossover between two parents"""
-        crossover_point = random.randint(1, 2)
+        crossover_point = rng.randint(1, 2)
         child = parent1[:crossover_point] + parent2[crossover_point:]
         return child
     
-    def _mutate(self, individual: List[int], filtered_meals: List[Dict]) -> List[int]:
+    def _mutate(self, individual: List[int], filtered_meals: List[Dict], rng: random.Random) -> List[int]:
         """Mutate an individual by changing one meal index"""
-        mutation_point = random.randint(0, 2)
+        mutation_point = rng.randint(0, 2)
         total = len(filtered_meals)
         if total > 0:
-            individual[mutation_point] = random.randint(0, total - 1)
+            individual[mutation_point] = rng.randint(0, total - 1)
         return individual
     
+    def _vectorized_genetic_algorithm_optimization(self, filtered_meals: List[Dict], fitness_goal: str,
+                                                   budget: Optional[GenerationBudget] = None,
+                                                   rng: Optional[np.random.Generator] = None) -> Dict[str, Any]:
+        """Optimize meal selection using a NumPy genetic algorithm over an (N x 3) index array"""
+        rng = rng if rng is not None else np.random.default_rng()
+        budget = budget or GenerationBudget(self.GENERATIONS)
+        population_size = self.POPULATION_SIZE
+        total = len(filtered_meals)
+        
+        population = self._initialize_population_batch(total, population_size, rng)
+        best_individual = population[0].tolist()
+        
+        while True:
+            fitness_scores = self._calculate_fitness_batch(population, fitness_goal)
+            
+            generation_best = int(np.argmax(fitness_scores))
+            if budget.record(float(fitness_scores[generation_best])):
+                best_individual = population[generation_best].tolist()
+            
+            if budget.should_stop():
+                break
+            
+            parents = self._tournament_selection_batch(population, fitness_scores, 2 * population_size, rng)
+            parents1, parents2 = parents[:population_size], parents[population_size:]
+            
+            children = self._crossover_batch(parents1, parents2, rng)
+            population = self._mutate_batch(children, total, rng)
+        
+        meal_plan = self._format_meal_plan(best_individual, filtered_meals)
+        meal_plan["optimizer"] = budget.report("numpy")
+        return meal_plan
+    
+    def _initialize_population_batch(self, total: int, population_size: int,
+                                     rng: np.random.Generator) -> np.ndarray:
+        """Initialize an (N x 3) population of distinct meal indices by rejection sampling"""
+        if total < 3:
+            return np.zeros((population_size, 3), dtype=np.int64)
+        population = rng.integers(0, total, size=(population_size, 3))
+        duplicates = ~self._distinct_mask(population)
+        while duplicates.any():
+            population[duplicates] = rng.integers(0, total, size=(int(duplicates.sum()), 3))
+            duplicates = ~self._distinct_mask(population)
+        return population
+    
+    @staticmethod
+    def _distinct_mask(population: np.ndarray) -> np.ndarray:
+        """Rows whose three meal indices are all different"""
+        return ((population[:, 0] != population[:, 1])
+                & (population[:, 1] != population[:, 2])
+                & (population[:, 0] != population[:, 2]))
+    
+    def _calculate_fitness_batch(self, population: np.ndarray, fitness_goal: str) -> np.ndarray:
+        """Calculate fitness scores for every row of the population"""
+        return 100.0 + 20.0 * self._distinct_mask(population) + self._goal_bonus(fitness_goal)
+    
+    def _tournament_selection_batch(self, population: np.ndarray, fitness_scores: np.ndarray,
+                                    count: int, rng: np.random.Generator) -> np.ndarray:
+        """Run `count` tournaments at once, each over distinct contenders"""
+        population_size = len(population)
+        tournament_size = self.TOURNAMENT_SIZE
+        contenders = rng.integers(0, population_size - np.arange(tournament_size), size=(count, tournament_size))
+        for j in range(1, tournament_size):
+            # Shift each draw past the indices already taken in its row, in ascending order
+            for taken in np.sort(contenders[:, :j], axis=1).T:
+                contenders[:, j] += contenders[:, j] >= taken
+        winners = contenders[np.arange(count), fitness_scores[contenders].argmax(axis=1)]
+        return population[winners]
+    
+    def _crossover_batch(self, parents1: np.ndarray, parents2: np.ndarray,
+                         rng: np.random.Generator) -> np.ndarray:
+        """Single-point crossover for every pair of parents"""
+        crossover_points = rng.integers(1, 3, size=len(parents1))
+        from_first = np.arange(3) < crossover_points[:, None]
+        return np.where(from_first, parents1, parents2)
+    
+    def _mutate_batch(self, population: np.ndarray, total: int, rng: np.random.Generator) -> np.ndarray:
+        """Mutate one meal index in each row selected with probability MUTATION_RATE"""
+        rows = np.flatnonzero(rng.random(len(population)) < self.MUTATION_RATE)
+        if total > 0 and rows.size:
+            mutation_points = rng.integers(0, 3, size=rows.size)
+            population[rows, mutation_points] = rng.integers(0, total, size=rows.size)
+        return population
+    
+    def generate_weekly_meal_plan(self, age_group: str, dietary_preference: str, fitness_goal: str,
+                                  days: int = 7, repeat_window: Optional[int] = None,
+                                  time_budget_ms: Optional[float] = None,
+                                  seed: Optional[int] = None) -> Dict[str, Any]:
+        """Plan several days at once, penalizing any meal repeated within `repeat_window` days"""
+        repeat_window = self.repeat_window if repeat_window is None else repeat_window
+        cache_key = ("week", age_group, dietary_preference, fitness_goal, days, repeat_window, seed)
+        if seed is not None:
+            weekly_plan = self.plan_cache.get(cache_key)
+            if weekly_plan is not None:
+                return self._copy_cached_plan(weekly_plan, "hit")
+        
+        filtered_meals = self._candidate_pool(age_group, dietary_preference, fitness_goal)
+        budget = GenerationBudget(
+            self.WEEK_ITERATIONS,
+            patience=self.WEEK_PATIENCE,
+            time_budget_ms=time_budget_ms if time_budget_ms is not None else self.time_budget_ms,
+        )
+        state = self._weekly_local_search(filtered_meals, fitness_goal, days, repeat_window, budget, random.Random(seed))
+        
+        weekly_plan = {
+            "days": [self._format_meal_plan(day, filtered_meals) for day in state.slots],
+            "generated_at": datetime.utcnow().isoformat(),
+            "optimizer": dict(budget.report("local_search"), repeats=state.repeats, repeat_window=repeat_window),
+        }
+        if seed is None:
+            return weekly_plan
+        self._cache_plan(cache_key, weekly_plan)
+        return self._copy_cached_plan(weekly_plan, "miss")
+    
+    def _weekly_local_search(self, filtered_meals: List[Dict], fitness_goal: str, days: int, repeat_window: int,
+                             budget: GenerationBudget, rng: random.Random) -> WeeklyPlanState:
+        """Hill-climb over single-slot changes, accepting moves that do not lower the week score"""
+        total = len(filtered_meals)
+        state = WeeklyPlanState(
+            self._initialize_population(filtered_meals, days, rng),
+            lambda day: self._calculate_fitness(day, fitness_goal),
+            repeat_window,
+            self.WEEK_REPEAT_PENALTY,
+        )
+        
+        budget.record(state.score)
+        while total > 1 and not budget.should_stop():
+            day = rng.randrange(days)
+            slot = rng.randrange(3)
+            meal = rng.randrange(total)
+            score_delta, day_score, repeat_change = state.delta(day, slot, meal)
+            # Sideways moves let the search drift across plateaus of equal score
+            if score_delta >= 0:
+                state.apply(day, slot, meal, score_delta, day_score, repeat_change)
+            budget.record(state.score)
+        return state
+    
     def _format_meal_plan(self, individual: List[int], filtered_meals: List[Dict]) -> Dict[str, Any]:
         """Format the best individual into a meal plan mapped to breakfast/lunch/dinner"""
         meal_plan: Dict[str, Any] = {}
@@ -214,4 +736,19 @@ class MealGenerationService:
         meal_plan["generated_at"] = datetime.utcnow().isoformat()
         return meal_plan
 
+_batch_worker_service: Optional[MealGenerationService] = None
+
+def _init_batch_worker(meals_database: List[Dict[str, Any]], settings: Dict[str, Any]) -> None:
+    """Build the service copy used by a batch worker process"""
+    global _batch_worker_service
+    _batch_worker_service = MealGenerationService(**settings)
+    _batch_worker_service.load_meals_database(meals_database)
+
+def _optimize_batch(age_group: str, dietary_preference: str, fitness_goal: str, engine: str,
+                    seeds: List[int]) -> List[Dict[str, Any]]:
+    return [
+        _batch_worker_service._optimize(age_group, dietary_preference, fitness_goal, engine, None, seed)
+        for seed in seeds
+    ]
+
 meal_generation_service = MealGenerationService() 
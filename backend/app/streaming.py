@@ -0,0 +1,35 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+def wants_ndjson() -> bool:
+    """Whether the client asked for a streamed NDJSON body (`?format=ndjson` or the Accept header)"""
+    return (request.args.get('format') == 'ndjson'
+            or request.accept_mimetypes.best == NDJSON_MIMETYPE)
+
+def ndjson_response(cursor, serialize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None) -> Response:
+    """Stream a PyMongo cursor as one JSON document per line.
+
+    Documents are pulled from the server `STREAM_BATCH_SIZE` at a time and each is
+    serialized and sent before the next is read, so memory stays flat however
+    many documents match. `serialize` reshapes a document before encoding; BSON
+    values are handled by the app's JSON provider.
+    """
+    batch_size = current_app.config.get('STREAM_BATCH_SIZE', 100)
+    return Response(
+        stream_with_context(_ndjson_lines(cursor.batch_size(batch_size), serialize, current_app.json.compact_dumps)),
+        mimetype=NDJSON_MIMETYPE
+    )
+
+def _ndjson_lines(documents: Iterable[Dict[str, Any]],
+                  serialize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]],
+                  dumps: Callable[[Any], str]) -> Iterator[str]:
+    try:
+        for document in documents:
+            yield dumps(serialize(document) if serialize else document) + '\n'
+    finally:
+        close = getattr(documents, 'close', None)
+        if close:
+            close()
@@ -0,0 +1,111 @@
+"""Endpoint benchmarks against create_app() backed by an in-process mongomock database.
+
+Requires `pip install mongomock`. Run from the backend directory:
+
+    python -m benchmarks.api --output bench_api.json
+"""
+import argparse
+import os
+import random
+
+try:
+    import mongomock
+except ImportError:  # pragma: no cover - benchmark-only dependency
+    raise SystemExit('The API benchmarks need mongomock: pip install mongomock')
+
+# Indexes are created on the in-process database below instead of a real server at startup
+os.environ.setdefault('MONGO_AUTO_INDEX', '0')
+
+from app import create_app
+from app.extensions import mongo
+from app.indexes import ensure_indexes
+from app.services import AGE_GROUPS, DIETARY_PREFERENCES, FITNESS_GOALS
+from .common import measure, write_results, print_result
+
+PASSWORD = 'BenchPassw0rd'
+
+def make_client():
+    app = create_app()
+    app.config['TESTING'] = True
+    client = mongomock.MongoClient()
+    mongo.cx = client
+    mongo.db = client['fitness_companion']
+    ensure_indexes(mongo.db)
+    return app.test_client()
+
+def expect(status, call, name):
+    """Wrap `call` so any response other than `status` aborts the run instead of being timed"""
+    def checked():
+        response = call()
+        if response.status_code != status:
+            raise SystemExit(f'{name} returned {response.status_code}, expected {status}: '
+                             f'{response.get_data(as_text=True)}')
+        return response
+    return checked
+
+def seed_users(client, count, rng):
+    """Register users with random preferences, some history and a joined challenge"""
+    headers = []
+    for i in range(count):
+        response = expect(201, lambda: client.post('/api/auth/register', json={
+            'email': f'bench{i}@example.com', 'password': PASSWORD, 'fullName': f'Bench User {i}',
+            'age': rng.randint(18, 70), 'gender': rng.choice(['male', 'female']),
+            'weight': rng.uniform(50, 110), 'height': rng.uniform(150, 200),
+            'fitnessLevel': 'beginner', 'fitnessGoals': ['stay_fit'],
+        }), 'POST /api/auth/register')()
+        auth = {'Authorization': f"Bearer {response.get_json()['token']}"}
+        expect(201, lambda: client.post('/api/preferences', headers=auth, json={
+            'age_group': rng.choice(AGE_GROUPS),
+            'dietary_preference': rng.choice(DIETARY_PREFERENCES),
+            'fitness_goal': rng.choice(FITNESS_GOALS),
+        }), 'POST /api/preferences')()
+        expect(201, lambda: client.post('/api/generate-meal-plan', headers=auth), 'POST /api/generate-meal-plan')()
+        expect(201, lambda: client.post('/api/challenges/1/join', headers=auth), 'POST /api/challenges/1/join')()
+        headers.append(auth)
+    return headers
+
+def run(users, repeat):
+    rng = random.Random(0)
+    client = make_client()
+    headers = seed_users(client, users, rng)
+
+    def pick():
+        return rng.choice(headers)
+
+    endpoints = [
+        ('POST /api/auth/login', 200, max(1, repeat // 10), lambda: client.post(
+            '/api/auth/login', json={'email': 'bench0@example.com', 'password': PASSWORD})),
+        ('POST /api/preferences', 201, repeat, lambda: client.post('/api/preferences', headers=pick(), json={
+            'age_group': 'adult', 'dietary_preference': 'vegetarian', 'fitness_goal': 'stay_fit'})),
+        ('POST /api/generate-meal-plan', 201, repeat,
+         lambda: client.post('/api/generate-meal-plan', headers=pick())),
+        ('GET /api/meal-plans/history', 200, repeat, lambda: client.get('/api/meal-plans/history', headers=pick())),
+        ('GET /api/meals/available', 200, repeat, lambda: client.get('/api/meals/available', headers=pick())),
+        ('GET /api/badges', 200, repeat, lambda: client.get('/api/badges', headers=pick())),
+        ('GET /api/progress', 200, repeat, lambda: client.get('/api/progress', headers=pick())),
+        ('GET /api/challenges', 200, repeat, lambda: client.get('/api/challenges', headers=pick())),
+        ('GET /api/user-challenges', 200, repeat, lambda: client.get('/api/user-challenges', headers=pick())),
+        ('GET /api/auth/profile', 200, repeat, lambda: client.get('/api/auth/profile', headers=pick())),
+        ('GET /api/auth/calculate-health-metrics', 200, repeat,
+         lambda: client.get('/api/auth/calculate-health-metrics', headers=pick())),
+    ]
+
+    results = []
+    for name, status, n, fn in endpoints:
+        # Every call is checked, warmup included, so error responses are never timed as successes
+        result = dict(name=name, params={'users': users}, **measure(expect(status, fn, name), n))
+        print_result(result)
+        results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50, help='Users seeded into the in-process database')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--output', default='bench_api.json')
+    args = parser.parse_args()
+
+    write_results('api', run(args.users, args.repeat), args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+SYNTHETIC_TAGS = {
+    'age_group': ['young', 'adult', 'older'],
+    'dietary_preference': ['vegetarian', 'non_vegetarian'],
+    'fitness_goal': ['weight_loss', 'weight_gain', 'stay_fit'],
+}
+
+def synthetic_catalog(size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Meal catalog with the same tag vocabulary and rough proportions as the built-in one"""
+    rng = random.Random(seed)
+    meals = []
+    for i in range(size):
+        tags = [
+            rng.choice(SYNTHETIC_TAGS['dietary_preference']),
+            rng.choice(SYNTHETIC_TAGS['fitness_goal']),
+        ]
+        tags += rng.sample(SYNTHETIC_TAGS['age_group'], rng.randint(1, 2))
+        if rng.random() < 0.15:
+            tags.append('no_sugar')
+        meals.append({'name': f'Synthetic Meal {i}', 'tags': tags})
+    return meals
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """Run `fn` `repeat` times and summarize the wall-clock latencies in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        'n': repeat,
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'min_ms': round(min(samples), 4),
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+    }
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_results(suite: str, results: List[Dict[str, Any]], output: str) -> None:
+    """Write results with enough context to compare runs across commits"""
+    report = {
+        'suite': suite,
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {len(results)} results to {output}')
+
+def print_result(result: Dict[str, Any]) -> None:
+    params = ' '.join(f'{k}={v}' for k, v in result.get('params', {}).items())
+    print(f"{result['name']:<40} {params:<60} p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms")
@@ -0,0 +1,43 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --metric p50_ms --threshold 1.2
+
+Exits with status 1 when any benchmark in the candidate is slower than the
+baseline by more than the threshold ratio.
+"""
+import argparse
+import json
+
+def result_key(result):
+    return result['name'], tuple(sorted(result.get('params', {}).items()))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--metric', default='p50_ms')
+    parser.add_argument('--threshold', type=float, default=1.2, help='Slowdown ratio counted as a regression')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = {result_key(r): r for r in json.load(f)['results']}
+    with open(args.candidate) as f:
+        candidate = json.load(f)['results']
+
+    regressions = 0
+    for result in candidate:
+        before = baseline.get(result_key(result))
+        if not before or not before[args.metric]:
+            continue
+        ratio = result[args.metric] / before[args.metric]
+        flag = 'REGRESSION' if ratio > args.threshold else ''
+        regressions += bool(flag)
+        params = ' '.join(f'{k}={v}' for k, v in result.get('params', {}).items())
+        print(f"{result['name']:<40} {params:<60} {before[args.metric]:>10.3f} -> {result[args.metric]:>10.3f} "
+              f"x{ratio:.2f} {flag}")
+
+    print(f'{regressions} regression(s) above x{args.threshold}')
+    raise SystemExit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
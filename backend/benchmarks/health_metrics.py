@@ -0,0 +1,56 @@
+"""Benchmarks for cohort health metrics.
+
+Run from the backend directory:
+
+    python -m benchmarks.health_metrics --output bench_health_metrics.json
+
+Documents are pre-built dicts shaped like the projected cursor output, so the
+numbers cover the NumPy pass and not Mongo decoding.
+"""
+import argparse
+import random
+
+from app.health_metrics import cohort_health_metrics, user_health_metrics
+from .common import measure, write_results, print_result
+
+COHORT_SIZES = [1000, 10000, 100000]
+
+def synthetic_cohort(size, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            'weight': rng.uniform(40, 140),
+            'height': rng.uniform(140, 205),
+            'age': rng.randint(13, 90),
+            'gender': rng.choice(['male', 'female'])
+        }
+        for _ in range(size)
+    ]
+
+def run(sizes, repeat, scalar_repeat):
+    results = []
+    for size in sizes:
+        users = synthetic_cohort(size)
+        benchmarks = [
+            ('cohort_health_metrics', repeat, lambda: cohort_health_metrics(users)),
+            # Per-user scalar path, for comparison with the vectorized pass
+            ('user_health_metrics_loop', scalar_repeat, lambda: [user_health_metrics(**user) for user in users]),
+        ]
+        for name, n, fn in benchmarks:
+            result = dict(name=name, params={'users': size}, **measure(fn, n))
+            print_result(result)
+            results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=COHORT_SIZES, help='Cohort sizes to benchmark')
+    parser.add_argument('--repeat', type=int, default=20, help='Iterations of the vectorized pass')
+    parser.add_argument('--scalar-repeat', type=int, default=3, help='Iterations of the per-user loop')
+    parser.add_argument('--output', default='bench_health_metrics.json')
+    args = parser.parse_args()
+
+    write_results('health_metrics', run(args.sizes, args.repeat, args.scalar_repeat), args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Benchmarks for serializing meal plan history payloads.
+
+Run from the backend directory:
+
+    python -m benchmarks.json_serialization --output bench_json_serialization.json
+
+Documents are pre-built dicts shaped like `generated_meal_plans` cursor output,
+with ObjectId and datetime values and meals from the built-in catalog, so the
+numbers cover encoding and not Mongo decoding. The orjson case is skipped when orjson is not installed.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app import json_provider
+from app.json_provider import BSONJSONProvider
+from app.services import MealGenerationService
+from .common import measure, write_results, print_result
+
+HISTORY_SIZES = [100, 1000, 10000]
+
+def synthetic_history(size, seed=0):
+    """Plans shaped like the documents the generate-meal-plan, batch and week routes store"""
+    rng = random.Random(seed)
+    meals = MealGenerationService().meals_database
+    user_id = str(ObjectId())
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            '_id': ObjectId(),
+            'user_id': user_id,
+            'date': start + timedelta(days=day, seconds=rng.randint(0, 86399)),
+            'breakfast': rng.choice(meals),
+            'lunch': rng.choice(meals),
+            'dinner': rng.choice(meals),
+            'generated_at': start + timedelta(days=day, seconds=rng.randint(0, 86399))
+        }
+        for day in range(size)
+    ]
+
+def _converted(plans):
+    # The per-route loop the history endpoint ran before the provider handled BSON types
+    converted = []
+    for plan in plans:
+        plan = dict(plan)
+        plan['_id'] = str(plan['_id'])
+        plan['date'] = plan['date'].isoformat()
+        plan['generated_at'] = plan['generated_at'].isoformat()
+        converted.append(plan)
+    return converted
+
+def run(sizes, repeat):
+    provider = BSONJSONProvider(Flask(__name__))
+    provider.compact = True
+    benchmarks = [
+        ('manual_conversion_stdlib', lambda plans: DefaultJSONProvider.dumps(provider, {'meal_plans': _converted(plans)})),
+        ('provider_stdlib', lambda plans: DefaultJSONProvider.dumps(provider, {'meal_plans': plans})),
+    ]
+    if json_provider.orjson is not None:
+        benchmarks.append(('provider_orjson', lambda plans: provider.dumps({'meal_plans': plans})))
+
+    results = []
+    for size in sizes:
+        plans = synthetic_history(size)
+        for name, fn in benchmarks:
+            result = dict(name=name, params={'plans': size}, **measure(lambda: fn(plans), repeat))
+            print_result(result)
+            results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=HISTORY_SIZES, help='History lengths to benchmark')
+    parser.add_argument('--repeat', type=int, default=20, help='Iterations per case')
+    parser.add_argument('--output', default='bench_json_serialization.json')
+    args = parser.parse_args()
+
+    write_results('json_serialization', run(args.sizes, args.repeat), args.output)
+
+if __name__ == '__main__':
+    main()
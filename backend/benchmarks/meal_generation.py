@@ -0,0 +1,64 @@
+"""Micro-benchmarks for the meal generation engine.
+
+Run from the backend directory:
+
+    python -m benchmarks.meal_generation --output bench_meal_generation.json
+"""
+import argparse
+import itertools
+
+from app.services import (
+    MealGenerationService, GenerationBudget, AGE_GROUPS, DIETARY_PREFERENCES, FITNESS_GOALS
+)
+from .common import synthetic_catalog, measure, write_results, print_result
+
+CATALOG_SIZES = [41, 1000, 10000, 100000]
+
+def run(sizes, repeat, ga_repeat):
+    results = []
+    for size in sizes:
+        service = MealGenerationService()
+        if size != len(service.meals_database):
+            service.load_meals_database(synthetic_catalog(size))
+
+        for preferences in itertools.product(AGE_GROUPS, DIETARY_PREFERENCES, FITNESS_GOALS):
+            params = {
+                'catalog_size': size,
+                'age_group': preferences[0],
+                'dietary_preference': preferences[1],
+                'fitness_goal': preferences[2],
+                'pool_size': len(service._candidate_pool(*preferences)),
+            }
+            pool = service._candidate_pool(*preferences)
+            fitness_goal = preferences[2]
+
+            benchmarks = [
+                ('filter_meals_by_preferences', repeat,
+                 lambda: service.filter_meals_by_preferences(*preferences)),
+                ('generate_meal_plan', ga_repeat,
+                 lambda: service.generate_meal_plan(*preferences)),
+                ('ga_python', ga_repeat,
+                 lambda: service._genetic_algorithm_optimization(
+                     pool, fitness_goal, GenerationBudget(service.GENERATIONS))),
+                ('ga_numpy', ga_repeat,
+                 lambda: service._vectorized_genetic_algorithm_optimization(
+                     pool, fitness_goal, GenerationBudget(service.GENERATIONS))),
+            ]
+            for name, n, fn in benchmarks:
+                result = dict(name=name, params=params, **measure(fn, n))
+                print_result(result)
+                results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=CATALOG_SIZES, help='Catalog sizes to benchmark')
+    parser.add_argument('--repeat', type=int, default=200, help='Iterations for cheap operations')
+    parser.add_argument('--ga-repeat', type=int, default=20, help='Iterations for optimizer runs')
+    parser.add_argument('--output', default='bench_meal_generation.json')
+    args = parser.parse_args()
+
+    write_results('meal_generation', run(args.sizes, args.repeat, args.ga_repeat), args.output)
+
+if __name__ == '__main__':
+    main()
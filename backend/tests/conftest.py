@@ -0,0 +1,99 @@
+"""Fixtures for tests that need a real MongoDB server.
+
+Update pipelines, `$$NOW` and concurrent writes are not emulated faithfully by
+in-memory fakes, so these tests run against the server at MONGO_TEST_URI
+(default mongodb://localhost:27017) in a throwaway database, and are skipped
+when no server is reachable.
+"""
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from bson import ObjectId
+from flask_jwt_extended import create_access_token
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+MONGO_TEST_URI = os.environ.get('MONGO_TEST_URI', 'mongodb://localhost:27017')
+
+@pytest.fixture(scope='session')
+def mongo_server():
+    client = MongoClient(MONGO_TEST_URI, serverSelectionTimeoutMS=2000)
+    try:
+        version = client.server_info()['versionArray']
+    except PyMongoError as e:
+        client.close()
+        pytest.skip(f"No MongoDB server at {MONGO_TEST_URI} ({type(e).__name__})")
+    if version < [4, 2]:
+        client.close()
+        pytest.skip('Update pipelines need MongoDB 4.2 or later')
+    yield client
+    client.close()
+
+@pytest.fixture
+def app(mongo_server, monkeypatch):
+    from app import create_app
+    from app.config import Config
+
+    db_name = f'fitness_companion_test_{uuid.uuid4().hex[:12]}'
+    monkeypatch.setattr(Config, 'MONGO_URI', f"{MONGO_TEST_URI.rstrip('/')}/{db_name}")
+    monkeypatch.setattr(Config, 'MONGO_SERVER_SELECTION_TIMEOUT_MS', 2000)
+    app = create_app()
+    app.config['TESTING'] = True
+    yield app
+    mongo_server.drop_database(db_name)
+
+@pytest.fixture
+def db(app):
+    from app.extensions import mongo
+    return mongo.db
+
+@pytest.fixture
+def make_user(app, db):
+    """Insert a user directly (skipping password hashing) and return (user_id, auth headers)"""
+    def make_user(**fields):
+        user = {
+            'email': f'{uuid.uuid4().hex}@example.com',
+            'full_name': 'Test User',
+            'created_at': False,
+            **fields
+        }
+        user_id = str(db.users.insert_one(user).inserted_id)
+        with app.app_context():
+            token = create_access_token(identity=user_id)
+        return user_id, {'Authorization': f'Bearer {token}'}
+    return make_user
+
+@pytest.fixture
+def join_challenge(app):
+    """Join a predefined challenge through the API and return the user challenge id"""
+    def join_challenge(headers, challenge_id):
+        response = app.test_client().post(f'/api/challenges/{challenge_id}/join', headers=headers)
+        assert response.status_code == 201, response.get_json()
+        return ObjectId(response.get_json()['user_challenge']['_id'])
+    return join_challenge
+
+@pytest.fixture
+def complete_day(app):
+    """POST complete-day for a YYYY-MM-DD day; safe to call from several threads at once"""
+    def complete_day(headers, user_challenge_id, day):
+        return app.test_client().post(
+            f'/api/user-challenges/{user_challenge_id}/complete-day', json={'day': day}, headers=headers)
+    return complete_day
+
+def _run_concurrently(calls):
+    """Start every call at the same instant on its own thread and return the results in order"""
+    barrier = threading.Barrier(len(calls))
+
+    def run(call):
+        barrier.wait()
+        return call()
+
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        return list(executor.map(run, calls))
+
+@pytest.fixture
+def concurrently():
+    return _run_concurrently
@@ -0,0 +1,94 @@
+"""A small evaluator for the aggregation operators the app's update pipelines use.
+
+It applies `$set`/`$unset` stages to a plain dict the way the server does,
+so pipeline logic can be tested without MongoDB. Unsupported operators raise,
+so a pipeline that grows past this subset fails loudly instead of passing.
+"""
+import math
+from datetime import datetime
+
+MISSING = object()
+
+def _number(value):
+    return value.timestamp() * 1000 if isinstance(value, datetime) else value
+
+def _subtract(a, b):
+    if isinstance(a, datetime) and isinstance(b, datetime):
+        return int((a - b).total_seconds() * 1000)
+    return a - b
+
+def _to_string(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+OPERATORS = {
+    '$add': lambda args: sum(args),
+    '$subtract': lambda args: _subtract(*args),
+    '$multiply': lambda args: math.prod(args),
+    '$divide': lambda args: _number(args[0]) / _number(args[1]),
+    '$mod': lambda args: math.fmod(args[0], args[1]),
+    '$floor': lambda args: math.floor(args[0]),
+    '$pow': lambda args: args[0] ** args[1],
+    '$max': lambda args: max(arg for arg in args if arg is not None),
+    '$toLong': lambda args: int(args[0]),
+    '$toString': lambda args: _to_string(args[0]),
+    '$concat': lambda args: ''.join(args),
+    '$concatArrays': lambda args: [item for arg in args for item in arg],
+    '$eq': lambda args: args[0] == args[1],
+    '$ne': lambda args: args[0] != args[1],
+    '$gt': lambda args: args[0] > args[1],
+    '$gte': lambda args: args[0] >= args[1],
+    '$lt': lambda args: args[0] < args[1],
+    '$and': lambda args: all(args),
+    '$or': lambda args: any(args),
+    '$not': lambda args: not args[0],
+}
+
+def evaluate(expression, document, now):
+    if isinstance(expression, str):
+        if expression == '$$NOW':
+            return now
+        if expression.startswith('$'):
+            return document.get(expression[1:], MISSING)
+        return expression
+    if isinstance(expression, list):
+        return [evaluate(item, document, now) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+    if len(expression) == 1:
+        (operator, args), = expression.items()
+        if operator == '$literal':
+            return args
+        if operator == '$ifNull':
+            value = evaluate(args[0], document, now)
+            return evaluate(args[1], document, now) if value in (None, MISSING) else value
+        if operator == '$cond':
+            branch = args[1] if evaluate(args[0], document, now) else args[2]
+            return evaluate(branch, document, now)
+        if operator.startswith('$'):
+            if operator not in OPERATORS:
+                raise NotImplementedError(operator)
+            values = evaluate(args if isinstance(args, list) else [args], document, now)
+            return OPERATORS[operator]([None if value is MISSING else value for value in values])
+    return {key: evaluate(value, document, now) for key, value in expression.items()}
+
+def apply_update(document, pipeline, now=None):
+    """The document an update pipeline of `$set`/`$unset` stages would leave"""
+    now = now or datetime.utcnow()
+    document = dict(document)
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == '$set':
+            values = {field: evaluate(expression, document, now) for field, expression in spec.items()}
+            for field, value in values.items():
+                if value is MISSING:
+                    document.pop(field, None)
+                else:
+                    document[field] = value
+        elif name == '$unset':
+            for field in [spec] if isinstance(spec, str) else spec:
+                document.pop(field, None)
+        else:
+            raise NotImplementedError(name)
+    return document
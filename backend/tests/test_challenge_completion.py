@@ -0,0 +1,76 @@
+"""Concurrent complete-day requests award a challenge exactly once (real MongoDB)."""
+from bson import ObjectId
+
+from app.challenge_progress import decode_progress
+
+def _days(db, user_challenge_id):
+    return list(decode_progress(db.user_challenges.find_one({'_id': user_challenge_id})))
+
+def _user(db, user_id):
+    return db.users.find_one({'_id': ObjectId(user_id)})
+
+def test_parallel_completions_of_the_last_day_award_once(db, make_user, join_challenge, complete_day, concurrently):
+    user_id, headers = make_user()
+    user_challenge_id = join_challenge(headers, '1')
+    days = _days(db, user_challenge_id)
+    for day in days[:-1]:
+        assert complete_day(headers, user_challenge_id, day).status_code == 200
+
+    responses = concurrently([lambda: complete_day(headers, user_challenge_id, days[-1])] * 16)
+
+    assert [response.status_code for response in responses] == [200] * 16
+    user = _user(db, user_id)
+    assert user['experience'] == 50
+    assert user['level'] == 1
+    assert [badge['name'] for badge in user['badges']] == ['Challenge Master']
+    assert user['milestones'] == []
+
+def test_parallel_completions_of_every_day_award_once(db, make_user, join_challenge, complete_day, concurrently):
+    user_id, headers = make_user()
+    user_challenge_id = join_challenge(headers, '1')
+    days = _days(db, user_challenge_id)
+
+    # Each day three times over, all racing each other
+    calls = [lambda day=day: complete_day(headers, user_challenge_id, day) for day in days * 3]
+    responses = concurrently(calls)
+
+    assert all(response.status_code == 200 for response in responses)
+    user_challenge = db.user_challenges.find_one({'_id': user_challenge_id})
+    assert user_challenge['completed'] is True
+    assert user_challenge['progress_bits'] == user_challenge['completed_mask']
+    user = _user(db, user_id)
+    assert user['experience'] == 50
+    assert len(user['badges']) == 1
+
+def test_parallel_awards_level_up_once(db, make_user, join_challenge, complete_day, concurrently):
+    user_id, headers = make_user(experience=80, level=1)
+    first = join_challenge(headers, '1')
+    second = join_challenge(headers, '2')
+    for user_challenge_id in (first, second):
+        for day in _days(db, user_challenge_id)[:-1]:
+            assert complete_day(headers, user_challenge_id, day).status_code == 200
+
+    responses = concurrently([
+        lambda: complete_day(headers, first, _days(db, first)[-1]),
+        lambda: complete_day(headers, second, _days(db, second)[-1]),
+    ])
+
+    assert [response.status_code for response in responses] == [200, 200]
+    # 80 + 50 crosses level 1's 100 XP; the second award (180) stays short of level 2's 200
+    user = _user(db, user_id)
+    assert user['experience'] == 180
+    assert user['level'] == 2
+    assert [milestone['name'] for milestone in user['milestones']] == ['Level 2']
+    assert user['milestones'][0]['details'] == 'Reached level 2'
+    assert len(user['badges']) == 2
+
+def test_award_defaults_missing_experience_and_level(db, make_user, join_challenge, complete_day):
+    user_id, headers = make_user()
+    user_challenge_id = join_challenge(headers, '6')
+    for day in _days(db, user_challenge_id):
+        assert complete_day(headers, user_challenge_id, day).status_code == 200
+
+    user = _user(db, user_id)
+    assert user['experience'] == 150
+    assert user['level'] == 2
+    assert [milestone['name'] for milestone in user['milestones']] == ['Level 2']
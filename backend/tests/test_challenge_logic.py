@@ -0,0 +1,117 @@
+"""Challenge progress encoding and the completion pipelines, evaluated without a server."""
+import random
+from datetime import datetime, timedelta
+
+from app.challenge_progress import (
+    award_completion_pipeline, complete_day_pipeline, day_bit, decode_progress, encode_progress, new_progress
+)
+from .pipeline import apply_update
+
+START = datetime(2024, 3, 1)
+NOW = datetime(2024, 3, 20, 12, 0)
+
+def _day(offset):
+    return START + timedelta(days=offset)
+
+def _challenge(duration=7, progress_bits=0, **fields):
+    return {**new_progress(START + timedelta(hours=15), duration), 'progress_bits': progress_bits,
+            'completed': False, **fields}
+
+def test_new_progress_starts_at_midnight_with_one_bit_per_day():
+    progress = new_progress(START + timedelta(hours=15), 14)
+    assert progress == {'start_day': START, 'progress_bits': 0, 'completed_mask': (1 << 14) - 1}
+
+def test_encode_decode_round_trip():
+    legacy = {'2024-03-03': True, '2024-03-01': False, '2024-03-02': True, '2024-03-05': False}
+    encoded = encode_progress(legacy)
+    assert encoded == {'start_day': START, 'progress_bits': 0b110, 'completed_mask': 0b10111}
+    assert decode_progress(encoded) == dict(sorted(legacy.items()))
+
+def test_decode_passes_legacy_documents_through():
+    assert decode_progress({'progress': {'2024-03-01': True}}) == {'2024-03-01': True}
+    assert decode_progress({}) == {}
+
+def test_encode_empty_progress():
+    assert decode_progress(encode_progress({})) == {}
+
+def test_day_bit():
+    challenge = _challenge()
+    assert day_bit(challenge, _day(0)) == 1
+    assert day_bit(challenge, _day(6)) == 1 << 6
+    assert day_bit(challenge, _day(-1)) == 0
+    assert day_bit(challenge, _day(7)) == 0
+
+def test_complete_day_sets_the_bit_and_cleans_up():
+    updated = apply_update(_challenge(), complete_day_pipeline(_day(2)), NOW)
+    assert updated['progress_bits'] == 0b100
+    assert updated['completed'] is False
+    assert 'completed_at' not in updated
+    assert '_day_bit' not in updated
+
+def test_complete_day_is_idempotent():
+    challenge = _challenge(progress_bits=0b100)
+    assert apply_update(challenge, complete_day_pipeline(_day(2)), NOW) == challenge
+
+def test_days_outside_the_challenge_change_nothing():
+    challenge = _challenge(progress_bits=0b1)
+    for day in (_day(-1), _day(7), _day(61), _day(62), _day(400)):
+        assert apply_update(challenge, complete_day_pipeline(day), NOW) == challenge
+
+def test_last_day_completes_and_stamps_once():
+    completed = apply_update(_challenge(progress_bits=0b0111111), complete_day_pipeline(_day(6)), NOW)
+    assert completed['progress_bits'] == completed['completed_mask']
+    assert completed['completed'] is True
+    assert completed['completed_at'] == NOW
+
+    later = NOW + timedelta(days=1)
+    assert apply_update(completed, complete_day_pipeline(_day(3)), later) == completed
+
+def test_pipeline_matches_day_bit_for_any_order_of_days():
+    rng = random.Random(0)
+    for _ in range(50):
+        challenge = _challenge(duration=14)
+        expected = 0
+        for offset in rng.choices(range(-3, 17), k=20):
+            challenge = apply_update(challenge, complete_day_pipeline(_day(offset)), NOW)
+            expected |= day_bit(challenge, _day(offset))
+            assert challenge['progress_bits'] == expected
+        assert challenge['completed'] == (expected == (1 << 14) - 1)
+
+def test_award_defaults_missing_fields():
+    user = apply_update({'email': 'a@example.com'}, award_completion_pipeline(50, NOW), NOW)
+    assert user['experience'] == 50
+    assert user['level'] == 1
+    assert user['milestones'] == []
+    assert user['badges'] == [{
+        'name': 'Challenge Master', 'details': 'Completed a fitness challenge', 'icon': '🏆',
+        'category': 'challenge', 'awarded_at': NOW
+    }]
+
+def test_award_keeps_existing_badges():
+    earlier = {'name': 'Challenge Master', 'awarded_at': START}
+    user = apply_update({'experience': 10, 'level': 1, 'badges': [earlier]}, award_completion_pipeline(50, NOW), NOW)
+    assert user['badges'][0] == earlier
+    assert len(user['badges']) == 2
+
+def test_award_levels_up_when_xp_reaches_the_threshold():
+    user = apply_update({'experience': 50, 'level': 1}, award_completion_pipeline(50, NOW), NOW)
+    assert user['experience'] == 100
+    assert user['level'] == 2
+    assert user['milestones'] == [{
+        'name': 'Level 2', 'details': 'Reached level 2', 'icon': '⭐', 'category': 'level', 'awarded_at': NOW
+    }]
+
+def test_award_below_the_threshold_keeps_the_level():
+    user = apply_update({'experience': 120, 'level': 2, 'milestones': []}, award_completion_pipeline(50, NOW), NOW)
+    assert user['experience'] == 170
+    assert user['level'] == 2
+    assert user['milestones'] == []
+
+def test_award_levels_up_once_per_completion():
+    user = apply_update({'experience': 0, 'level': 1}, award_completion_pipeline(350, NOW), NOW)
+    assert user['level'] == 2
+    assert [milestone['name'] for milestone in user['milestones']] == ['Level 2']
+
+def test_pipeline_shapes():
+    assert [next(iter(stage)) for stage in complete_day_pipeline(_day(0))] == ['$set', '$set', '$set', '$unset']
+    assert [next(iter(stage)) for stage in award_completion_pipeline(50, NOW)] == ['$set', '$set']
@@ -0,0 +1,110 @@
+"""The bitset complete-day update pipeline, run as a real update (real MongoDB)."""
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.challenge_progress import complete_day_pipeline, decode_progress, new_progress
+
+def _user_challenge(db, user_challenge_id):
+    return db.user_challenges.find_one({'_id': user_challenge_id})
+
+def _days(db, user_challenge_id):
+    return list(decode_progress(_user_challenge(db, user_challenge_id)))
+
+def test_complete_day_sets_only_that_bit(db, make_user, join_challenge, complete_day):
+    _, headers = make_user()
+    user_challenge_id = join_challenge(headers, '1')
+    days = _days(db, user_challenge_id)
+
+    assert complete_day(headers, user_challenge_id, days[2]).status_code == 200
+
+    user_challenge = _user_challenge(db, user_challenge_id)
+    assert user_challenge['progress_bits'] == 0b100
+    assert user_challenge['completed_mask'] == 0b1111111
+    assert user_challenge['completed'] is False
+    assert 'completed_at' not in user_challenge
+    assert '_day_bit' not in user_challenge
+
+def test_repeating_a_day_does_not_add_its_bit_twice(db, make_user, join_challenge, complete_day):
+    _, headers = make_user()
+    user_challenge_id = join_challenge(headers, '1')
+    day = _days(db, user_challenge_id)[0]
+
+    for _ in range(3):
+        assert complete_day(headers, user_challenge_id, day).status_code == 200
+
+    assert _user_challenge(db, user_challenge_id)['progress_bits'] == 0b1
+
+def test_days_outside_the_challenge_leave_it_unchanged(db, make_user, join_challenge, complete_day):
+    _, headers = make_user()
+    user_challenge_id = join_challenge(headers, '1')
+    days = _days(db, user_challenge_id)
+    assert complete_day(headers, user_challenge_id, days[0]).status_code == 200
+    before = _user_challenge(db, user_challenge_id)
+
+    first = datetime.strptime(days[0], '%Y-%m-%d')
+    outside = [first - timedelta(days=1), first + timedelta(days=len(days)), first + timedelta(days=400)]
+    for day in outside:
+        response = complete_day(headers, user_challenge_id, day.strftime('%Y-%m-%d'))
+        assert response.status_code == 400
+
+    assert _user_challenge(db, user_challenge_id) == before
+
+def test_completion_is_stamped_once(db, make_user, join_challenge, complete_day):
+    user_id, headers = make_user()
+    user_challenge_id = join_challenge(headers, '1')
+    days = _days(db, user_challenge_id)
+    for day in days:
+        assert complete_day(headers, user_challenge_id, day).status_code == 200
+
+    completed = _user_challenge(db, user_challenge_id)
+    assert completed['completed'] is True
+    assert completed['progress_bits'] == completed['completed_mask']
+    assert isinstance(completed['completed_at'], datetime)
+
+    # Already completed: the day is accepted again but nothing is re-stamped or re-awarded
+    assert complete_day(headers, user_challenge_id, days[0]).status_code == 200
+    assert _user_challenge(db, user_challenge_id) == completed
+    assert db.users.find_one({'_id': ObjectId(user_id)})['experience'] == 50
+
+def test_parallel_pipeline_updates_keep_every_bit(db, concurrently):
+    start = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    user_challenge_id = db.user_challenges.insert_one({
+        'user_id': 'pipeline-user',
+        'challenge_id': '6',
+        **new_progress(start, 14),
+        'completed': False
+    }).inserted_id
+
+    def complete(offset):
+        return lambda: db.user_challenges.update_one(
+            {'_id': user_challenge_id}, complete_day_pipeline(start + timedelta(days=offset)))
+
+    concurrently([complete(offset) for offset in range(14)] * 2)
+
+    user_challenge = _user_challenge(db, user_challenge_id)
+    assert user_challenge['progress_bits'] == (1 << 14) - 1
+    assert user_challenge['completed'] is True
+    assert isinstance(user_challenge['completed_at'], datetime)
+    assert '_day_bit' not in user_challenge
+
+def test_legacy_progress_is_encoded_on_first_completion(db, make_user, complete_day):
+    user_id, headers = make_user()
+    start = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    days = [(start + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(7)]
+    user_challenge_id = db.user_challenges.insert_one({
+        'user_id': user_id,
+        'challenge_id': '1',
+        'start_date': start,
+        'end_date': start + timedelta(days=7),
+        'progress': {day: index == 0 for index, day in enumerate(days)},
+        'completed': False
+    }).inserted_id
+
+    assert complete_day(headers, user_challenge_id, days[1]).status_code == 200
+
+    user_challenge = _user_challenge(db, user_challenge_id)
+    assert 'progress' not in user_challenge
+    assert user_challenge['start_day'] == start
+    assert user_challenge['progress_bits'] == 0b11
+    assert user_challenge['completed_mask'] == 0b1111111
@@ -0,0 +1,99 @@
+"""Cohort health metrics must agree with the single-user calculation for the same users."""
+import random
+from collections import Counter
+
+import pytest
+
+from app.health_metrics import (
+    BFP_CATEGORIES, BFP_THRESHOLDS, BMI_CATEGORIES, cohort_health_metrics, user_health_metrics
+)
+
+def _random_users(count, seed=0):
+    rng = random.Random(seed)
+    return [{
+        'weight': round(rng.uniform(35, 160), 1),
+        'height': round(rng.uniform(140, 210), 1),
+        'age': rng.randint(16, 90),
+        'gender': rng.choice(['male', 'female', 'Male', 'FEMALE']),
+    } for _ in range(count)]
+
+def _boundary_users():
+    """Users sitting exactly on every BMI and body-fat threshold"""
+    users = []
+    for bmi in (18.5, 25, 30):
+        users.append({'weight': bmi * 4, 'height': 200, 'age': 40, 'gender': 'female'})
+    for gender, thresholds in BFP_THRESHOLDS.items():
+        is_male = gender == 'male'
+        for bfp in thresholds.tolist():
+            # Solve the body-fat formula for the BMI that lands on the threshold at age 40
+            bmi = (bfp - 0.23 * 40 + 10.8 * is_male + 5.4) / 1.20
+            users.append({'weight': bmi * 4, 'height': 200, 'age': 40, 'gender': gender})
+    return users
+
+def _single_user_counts(users):
+    metrics = [user_health_metrics(**user) for user in users]
+    return (Counter(metric['bmi_category'] for metric in metrics),
+            Counter(metric['bfp_category'] for metric in metrics))
+
+def _cohort_counts(users):
+    metrics = cohort_health_metrics(users)
+    return (Counter({name: count for name, count in metrics['bmi']['categories'].items() if count}),
+            Counter({name: count for name, count in metrics['bfp']['categories'].items() if count}))
+
+@pytest.mark.parametrize('users', [_random_users(2000), _boundary_users()], ids=['random', 'boundaries'])
+def test_cohort_category_counts_match_single_user_metrics(users):
+    assert _cohort_counts(users) == _single_user_counts(users)
+
+def test_cohort_reports_every_category():
+    metrics = cohort_health_metrics(_random_users(50))
+    assert list(metrics['bmi']['categories']) == list(BMI_CATEGORIES)
+    assert list(metrics['bfp']['categories']) == list(BFP_CATEGORIES)
+
+def test_incomplete_profiles_are_excluded():
+    complete = _random_users(10)
+    incomplete = [
+        {'weight': 70, 'height': 180, 'age': 30},
+        {'weight': 70, 'height': 180, 'gender': 'male'},
+        {'weight': 0, 'height': 180, 'age': 30, 'gender': 'male'},
+        {'height': 180, 'age': 30, 'gender': 'female'},
+    ]
+    metrics = cohort_health_metrics(complete + incomplete)
+    assert metrics['users'] == 10
+    assert metrics['excluded'] == 4
+    assert _cohort_counts(complete + incomplete) == _single_user_counts(complete)
+
+def test_cohort_route_matches_the_single_user_route(app, make_user):
+    client = app.test_client()
+    _, admin = make_user(created_at=True)
+    singles = []
+    for user in _random_users(25, seed=1):
+        _, headers = make_user(fitness_level='cohort-test', **user)
+        response = client.get('/api/auth/calculate-health-metrics', headers=headers)
+        assert response.status_code == 200
+        singles.append(response.get_json()['metrics'])
+
+    response = client.get('/api/auth/calculate-health-metrics/cohort?fitness_level=cohort-test', headers=admin)
+
+    assert response.status_code == 200
+    metrics = response.get_json()['metrics']
+    assert metrics['users'] == 25
+    assert Counter({k: v for k, v in metrics['bmi']['categories'].items() if v}) == \
+        Counter(single['bmi_category'] for single in singles)
+    assert Counter({k: v for k, v in metrics['bfp']['categories'].items() if v}) == \
+        Counter(single['bfp_category'] for single in singles)
+
+@pytest.mark.parametrize('query', ['min_age=abc', 'max_age=3.5', 'min_age=', 'min_age=20&max_age=forty'])
+def test_cohort_route_rejects_unparseable_ages(app, make_user, query):
+    _, admin = make_user(created_at=True)
+    response = app.test_client().get(f'/api/auth/calculate-health-metrics/cohort?{query}', headers=admin)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+def test_cohort_route_filters_by_age(app, make_user):
+    _, admin = make_user(created_at=True)
+    for age in (20, 30, 40):
+        make_user(fitness_level='age-test', weight=70, height=180, age=age, gender='male')
+    response = app.test_client().get(
+        '/api/auth/calculate-health-metrics/cohort?fitness_level=age-test&min_age=25&max_age=40', headers=admin)
+    assert response.status_code == 200
+    assert response.get_json()['metrics']['users'] == 2
@@ -0,0 +1,106 @@
+"""The numpy GA engine against the python engine, and the batch operators it is built from."""
+import random
+from collections import Counter
+from math import comb
+
+import numpy as np
+import pytest
+
+from app.services import MealGenerationService
+from benchmarks.common import synthetic_catalog
+
+SEEDS = range(40)
+PROFILE = ('adult', 'vegetarian', 'weight_loss')
+
+@pytest.fixture(scope='module')
+def service():
+    service = MealGenerationService()
+    service.load_meals_database(synthetic_catalog(2000))
+    # The GA only runs on pools the exhaustive solver would not take
+    assert len(service._candidate_pool(*PROFILE)) > service.exhaustive_pool_limit
+    return service
+
+def _run(service, engine, patience):
+    service.patience = patience
+    try:
+        return [service._optimize(*PROFILE, engine, None, seed) for seed in SEEDS]
+    finally:
+        service.patience = 10
+
+def _summary(plans):
+    optimizers = [plan['optimizer'] for plan in plans]
+    return (Counter(optimizer['best_fitness'] for optimizer in optimizers),
+            Counter(optimizer['stop_reason'] for optimizer in optimizers),
+            np.mean([optimizer['generations'] for optimizer in optimizers]))
+
+@pytest.mark.parametrize('patience', [10, None])
+def test_engines_agree_on_fitness_and_stop_reason(service, patience):
+    python_plans = _run(service, 'python', patience)
+    numpy_plans = _run(service, 'numpy', patience)
+
+    assert {plan['optimizer']['engine'] for plan in numpy_plans} == {'numpy'}
+    assert _summary(numpy_plans) == _summary(python_plans)
+    best = 100 + 20 + service._goal_bonus(PROFILE[2])
+    assert set(_summary(numpy_plans)[0]) == {best}
+    expected_stop = 'converged' if patience else 'max_generations'
+    assert set(_summary(numpy_plans)[1]) == {expected_stop}
+
+def test_numpy_plans_use_three_distinct_meals_from_the_pool(service):
+    pool = {meal['name'] for meal in service._candidate_pool(*PROFILE)}
+    for plan in _run(service, 'numpy', 10):
+        meals = [plan[slot]['name'] for slot in ('breakfast', 'lunch', 'dinner')]
+        assert len(set(meals)) == 3
+        assert set(meals) <= pool
+
+def test_initial_population_rows_are_distinct(service):
+    population = service._initialize_population_batch(30, 500, np.random.default_rng(0))
+    assert population.shape == (500, 3)
+    assert service._distinct_mask(population).all()
+    assert population.min() >= 0 and population.max() < 30
+
+def test_tournament_contenders_are_distinct(service):
+    # With as many individuals as contenders every tournament sees the whole population
+    population = np.arange(3)[:, None].repeat(3, axis=1)
+    winners = service._tournament_selection_batch(population, np.array([1.0, 5.0, 2.0]), 2000,
+                                                  np.random.default_rng(0))
+    assert (winners == 1).all()
+
+def test_tournament_winners_match_the_python_engine(service):
+    # Fitness equals the index, so the winner is the largest of three distinct draws
+    size, draws = 5, 20000
+    population = np.arange(size)[:, None].repeat(3, axis=1)
+    fitness = np.arange(size, dtype=float)
+    winners = service._tournament_selection_batch(population, fitness, draws, np.random.default_rng(1))[:, 0]
+    batch = np.bincount(winners, minlength=size) / draws
+
+    rng = random.Random(1)
+    python = Counter(service._tournament_selection(population.tolist(), fitness.tolist(), rng)[0]
+                     for _ in range(draws))
+    expected = [comb(index, 2) / comb(size, 3) for index in range(size)]
+    for index in range(size):
+        assert batch[index] == pytest.approx(expected[index], abs=0.02)
+        assert python[index] / draws == pytest.approx(expected[index], abs=0.02)
+
+def test_crossover_takes_a_prefix_from_the_first_parent(service):
+    parents1 = np.zeros((2000, 3), dtype=np.int64)
+    parents2 = np.ones((2000, 3), dtype=np.int64)
+    children = service._crossover_batch(parents1, parents2, np.random.default_rng(0))
+    assert {tuple(child) for child in children.tolist()} == {(0, 1, 1), (0, 0, 1)}
+
+def test_crossover_genes_come_from_either_parent(service):
+    rng = np.random.default_rng(0)
+    parents1 = service._initialize_population_batch(50, 1000, rng)
+    parents2 = service._initialize_population_batch(50, 1000, rng)
+    children = service._crossover_batch(parents1, parents2, rng)
+    assert ((children == parents1) | (children == parents2)).all()
+    assert children.min() >= 0 and children.max() < 50
+
+def test_mutation_stays_in_bounds_and_changes_at_most_one_gene(service):
+    rng = np.random.default_rng(0)
+    population = service._initialize_population_batch(40, 10000, rng)
+    mutated = service._mutate_batch(population.copy(), 40, rng)
+    assert mutated.min() >= 0 and mutated.max() < 40
+    changed = (mutated != population).sum(axis=1)
+    assert changed.max() <= 1
+    # A mutation may redraw the same index, so slightly fewer rows change than are selected
+    assert 0.07 < (changed > 0).mean() <= service.MUTATION_RATE + 0.01